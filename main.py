@@ -1,20 +1,89 @@
 from fastapi import FastAPI, Depends, Request, Form, HTTPException, Response, status, BackgroundTasks
-from sqlalchemy import Column, Integer, String, create_engine, Date, Boolean
+from sqlalchemy import Column, Integer, String, create_engine, Date, Boolean, ForeignKey, Index, PrimaryKeyConstraint, select, insert, delete, union_all, literal, literal_column, bindparam, func, inspect, text, and_, true, event, or_, tuple_, update, DateTime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, date as dt_date
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
+from starlette.background import BackgroundTask
+from starlette.datastructures import UploadFile
+from fastapi.exception_handlers import http_exception_handler as default_http_exception_handler
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple, OrderedDict
+from types import MappingProxyType
+import asyncio
 import csv
-from io import StringIO
+import os
+import json
+import time
+import uuid
+import zlib
+import shutil
+import tempfile
+import queue
+import threading
+import glob
+import hashlib
+import logging
+from io import StringIO, TextIOWrapper
+from array import array
 
 # 데이터베이스 설정
-DATABASE_URL = "sqlite:///./users.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./users.db")
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# 요청 처리용 비동기 엔진 (aiosqlite)
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# SQLite 연결 설정 프로필 (SQLITE_PROFILE로 선택, SQLITE_<PRAGMA> 환경 변수로 항목별 변경)
+# default: SQLite 기본값, wal: WAL + 잠금 대기, performance: wal + 메모리 매핑/캐시 확대
+SQLITE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": "5000",
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": "5000",
+        "mmap_size": str(256 * 1024 * 1024),
+        "cache_size": "-65536",
+        "temp_store": "MEMORY",
+    },
+}
+SQLITE_PRAGMA_NAMES = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "performance")
+if SQLITE_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"알 수 없는 SQLITE_PROFILE: {SQLITE_PROFILE!r} (사용 가능: {', '.join(SQLITE_PROFILES)})")
+SQLITE_PRAGMAS = {
+    name: os.environ.get(f"SQLITE_{name.upper()}", SQLITE_PROFILES[SQLITE_PROFILE].get(name))
+    for name in SQLITE_PRAGMA_NAMES
+}
+SQLITE_PRAGMAS = {name: value for name, value in SQLITE_PRAGMAS.items() if value is not None}
+# PRAGMA optimize 실행 주기 (0이면 종료 시에만 실행)
+SQLITE_OPTIMIZE_INTERVAL_SECONDS = int(os.environ.get("SQLITE_OPTIMIZE_INTERVAL_SECONDS", "3600"))
+
+# 새 연결마다 프로필의 PRAGMA 적용 (동기/비동기 엔진 공통)
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+# 일정 저장 방식: "rows"(활동마다 한 행) 또는 "compact"(하루 한 행 + 완료 비트마스크)
+STORAGE_MODE = os.environ.get("STORAGE_MODE", "rows")
 Base = declarative_base()
 
 # 사용자 모델 정의
@@ -24,29 +93,376 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
 
+# 활동 카탈로그 모델 정의 (10Core 활동 목록)
+class Activity(Base):
+    __tablename__ = "activities"
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String)
+    image = Column(String)
+    sort_order = Column(Integer, nullable=False)
+
 # 일정 모델 정의
 class Schedule(Base):
     __tablename__ = "schedules"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
-    activity = Column(String)
+    user_id = Column(Integer)
+    activity_id = Column(Integer, ForeignKey("activities.id"))
     description = Column(String)
     date = Column(Date)
     completed = Column(Boolean, default=False)
+    # 마지막으로 내용이 바뀐 시각과 변경 횟수 (변경분 동기화용)
+    updated_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    row_version = Column(Integer, nullable=False, server_default="1")
+
+    __table_args__ = (
+        # 사용자/날짜/활동 당 한 행만 허용 (upsert 충돌 기준)
+        Index("uq_schedules_user_date_activity", "user_id", "date", "activity_id", unique=True),
+        # 사용자별 변경분 조회 (updated_at, id 순서로 이어서 읽기)
+        Index("ix_schedules_user_updated", "user_id", "updated_at", "id"),
+        # 완료 횟수 집계 전용 부분 커버링 인덱스 (검색/관리자 대시보드)
+        Index(
+            "ix_schedules_completed_user_date",
+            "user_id", "date", "activity_id",
+            sqlite_where=text("completed = 1"),
+        ),
+    )
+
+# 하루 기록 모델 정의 (compact 모드: 10개 완료 여부를 비트마스크 정수 하나로 저장)
+class DayRecord(Base):
+    __tablename__ = "day_records"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    # 활동 번호 n의 완료 여부는 (completed_mask >> (n - 1)) & 1
+    completed_mask = Column(Integer, nullable=False, default=0)
+    # 마지막으로 하루 기록이 바뀐 시각과 변경 횟수 (변경분 동기화용)
+    updated_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    row_version = Column(Integer, nullable=False, server_default="1")
+
+    __table_args__ = (
+        Index("uq_day_records_user_date", "user_id", "date", unique=True),
+        Index("ix_day_records_user_updated", "user_id", "updated_at", "id"),
+    )
+
+# 하루 기록 내용 모델 정의 (compact 모드: 내용을 입력한 활동만 저장)
+class DayDescription(Base):
+    __tablename__ = "day_descriptions"
+    user_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    activity_id = Column(Integer, nullable=False)
+    description = Column(String, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "date", "activity_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+# 일별 완료 집계 모델 정의 (사용자/날짜/활동별 완료 횟수)
+class DailyRollup(Base):
+    __tablename__ = "daily_rollups"
+    user_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    activity_id = Column(Integer, nullable=False)
+    completed_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "day", "activity_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+# 월별 완료 집계 모델 정의 (month는 해당 월의 1일)
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+    user_id = Column(Integer, nullable=False)
+    month = Column(Date, nullable=False)
+    activity_id = Column(Integer, nullable=False)
+    completed_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "month", "activity_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+# 일정 변경 기록 모델 정의 (추가 전용, seq는 재사용되지 않는 단조 증가 번호)
+class ScheduleChange(Base):
+    __tablename__ = "schedule_changes"
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    op = Column(String, nullable=False)  # "insert" 또는 "update"
+    user_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    activity_id = Column(Integer, nullable=False)
+    description = Column(String, nullable=False)
+    completed = Column(Boolean, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+# 사용자별 데이터 버전 모델 정의 (일정이 실제로 바뀐 저장마다 1씩 증가, 집계 캐시/ETag 무효화용)
+class UserDataVersion(Base):
+    __tablename__ = "user_data_versions"
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# 마이그레이션 1: 중복 일정 정리 후 (user_id, date, activity) 유니크 인덱스 생성
+def migrate_unique_schedule_day(conn):
+    conn.exec_driver_sql(
+        "DELETE FROM schedules WHERE id NOT IN "
+        "(SELECT MAX(id) FROM schedules GROUP BY user_id, date, activity)"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_schedules_user_date_activity "
+        "ON schedules (user_id, date, activity)"
+    )
+
+# 마이그레이션 2: 조회 패턴에 맞춘 복합/부분 인덱스로 교체
+def migrate_schedule_composite_indexes(conn):
+    # (user_id, date, activity) 유니크 인덱스가 user_id 단일 인덱스를 대신함
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_schedules_user_id")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_schedules_completed_user_date "
+        "ON schedules (user_id, date, activity) WHERE completed = 1"
+    )
+
+# 마이그레이션 3: "1: 운동" 형식의 활동 문자열을 활동 카탈로그 정수 키로 변환
+def migrate_activity_catalog(conn):
+    Activity.__table__.create(conn, checkfirst=True)
+    seed_activity_catalog(conn)
+    conn.exec_driver_sql("ALTER TABLE schedules RENAME TO schedules_old")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_schedules_id")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_schedules_user_date_activity")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_schedules_completed_user_date")
+    conn.exec_driver_sql(
+        "CREATE TABLE schedules ("
+        "id INTEGER NOT NULL, "
+        "user_id INTEGER, "
+        "activity_id INTEGER, "
+        "description VARCHAR, "
+        "date DATE, "
+        "completed BOOLEAN, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY(activity_id) REFERENCES activities (id))"
+    )
+    # CAST는 "10: e-com" 같은 문자열에서 앞의 활동 번호만 읽음
+    dropped = conn.exec_driver_sql(
+        "SELECT COUNT(*) FROM schedules_old "
+        "WHERE activity IS NULL OR CAST(activity AS INTEGER) NOT IN (SELECT id FROM activities)"
+    ).scalar()
+    if dropped:
+        logger.warning("활동 카탈로그 마이그레이션: 알 수 없는 활동의 일정 %d건은 옮기지 않음", dropped)
+    conn.exec_driver_sql(
+        "INSERT INTO schedules (id, user_id, activity_id, description, date, completed) "
+        "SELECT id, user_id, CAST(activity AS INTEGER), description, date, completed "
+        "FROM schedules_old WHERE CAST(activity AS INTEGER) IN (SELECT id FROM activities)"
+    )
+    conn.exec_driver_sql("DROP TABLE schedules_old")
+    conn.exec_driver_sql("CREATE INDEX ix_schedules_id ON schedules (id)")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX uq_schedules_user_date_activity "
+        "ON schedules (user_id, date, activity_id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX ix_schedules_completed_user_date "
+        "ON schedules (user_id, date, activity_id) WHERE completed = 1"
+    )
+
+# 마이그레이션 4: 일별/월별 집계 테이블 생성 후 기존 일정으로 채우기
+def migrate_rollup_tables(conn):
+    DailyRollup.__table__.create(conn, checkfirst=True)
+    MonthlyRollup.__table__.create(conn, checkfirst=True)
+    # 이 시점의 일정은 항상 schedules 테이블에 있음
+    rebuild_rollups(conn, storage_mode="rows")
+
+# 마이그레이션 5: compact 저장 모드용 테이블 생성 (데이터 이동은 sync_storage_layout)
+def migrate_compact_storage_tables(conn):
+    DayRecord.__table__.create(conn, checkfirst=True)
+    DayDescription.__table__.create(conn, checkfirst=True)
+
+# 마이그레이션 6: 일정 변경 기록 테이블 생성 (기록은 이 시점 이후의 변경부터)
+def migrate_schedule_changes_table(conn):
+    ScheduleChange.__table__.create(conn, checkfirst=True)
+
+# 마이그레이션 7: 변경 시각/버전 컬럼 추가 (기존 행은 마이그레이션 시각으로 채움)
+# compact 테이블은 마이그레이션 5에서 이미 최신 모델로 만들어졌을 수 있으므로 없는 컬럼만 추가
+def migrate_row_versions(conn):
+    migrated_at = datetime.utcnow()
+    for model, index_name in ((Schedule, "ix_schedules_user_updated"), (DayRecord, "ix_day_records_user_updated")):
+        table = model.__tablename__
+        columns = {column["name"] for column in inspect(conn).get_columns(table)}
+        if "updated_at" not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME")
+            conn.execute(update(model).values(updated_at=migrated_at))
+        if "row_version" not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} (user_id, updated_at, id)")
+
+# 마이그레이션 8: 사용자별 데이터 버전 테이블 추가 (없는 사용자는 버전 0)
+def migrate_user_data_versions(conn):
+    UserDataVersion.__table__.create(conn, checkfirst=True)
 
-Base.metadata.create_all(bind=engine)
+# 스키마 마이그레이션 목록 (PRAGMA user_version 순서대로 한 번씩 실행)
+MIGRATIONS = [
+    migrate_unique_schedule_day,
+    migrate_schedule_composite_indexes,
+    migrate_activity_catalog,
+    migrate_rollup_tables,
+    migrate_compact_storage_tables,
+    migrate_schedule_changes_table,
+    migrate_row_versions,
+    migrate_user_data_versions,
+]
+
+# 저장된 일정을 STORAGE_MODE 방식의 테이블로 옮김 (모드를 바꾼 뒤 첫 시작 시 한 번)
+def sync_storage_layout(conn):
+    if STORAGE_MODE == "compact":
+        if conn.exec_driver_sql("SELECT 1 FROM schedules LIMIT 1").first() is None:
+            return
+        conn.exec_driver_sql(
+            "INSERT INTO day_records (user_id, date, completed_mask, updated_at) "
+            "SELECT user_id, date, SUM(CASE WHEN completed THEN 1 << (activity_id - 1) ELSE 0 END), MAX(updated_at) "
+            "FROM schedules GROUP BY user_id, date "
+            "ON CONFLICT (user_id, date) DO UPDATE SET completed_mask = excluded.completed_mask, "
+            "updated_at = excluded.updated_at, row_version = row_version + 1"
+        )
+        conn.exec_driver_sql(
+            "INSERT OR REPLACE INTO day_descriptions (user_id, date, activity_id, description) "
+            "SELECT user_id, date, activity_id, description FROM schedules "
+            "WHERE description IS NOT NULL AND description != ''"
+        )
+        conn.exec_driver_sql("DELETE FROM schedules")
+    else:
+        if conn.exec_driver_sql("SELECT 1 FROM day_records LIMIT 1").first() is None:
+            return
+        conn.exec_driver_sql(
+            "INSERT OR REPLACE INTO schedules (user_id, activity_id, description, date, completed, updated_at) "
+            "SELECT d.user_id, a.id, COALESCE(dd.description, ''), d.date, (d.completed_mask >> (a.id - 1)) & 1, d.updated_at "
+            "FROM day_records d CROSS JOIN activities a "
+            "LEFT JOIN day_descriptions dd "
+            "ON dd.user_id = d.user_id AND dd.date = d.date AND dd.activity_id = a.id"
+        )
+        conn.exec_driver_sql("DELETE FROM day_descriptions")
+        conn.exec_driver_sql("DELETE FROM day_records")
+
+# 데이터베이스 초기화: 새 DB는 최신 스키마로 생성, 기존 DB는 밀린 마이그레이션 실행
+def init_db(conn):
+    if not inspect(conn).has_table("schedules"):
+        Base.metadata.create_all(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    else:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+        Base.metadata.create_all(conn)
+    seed_activity_catalog(conn)
+    sync_storage_layout(conn)
 
 # 세션 로컬 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # 비밀번호 해싱 설정
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# 해싱 전용 프로세스 수 (0이면 요청 처리 루프에서 직접 해싱)
+HASH_POOL_SIZE = int(os.environ.get("HASH_POOL_SIZE", "2"))
+# 해싱 대기열 최대 길이 (가득 차면 503으로 거절)
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", "64"))
+
+hash_executor = None
+
+# 쓰기 전용 스레드가 한 트랜잭션에 묶어 커밋하는 최대 작업 수
+WRITE_BATCH_SIZE = int(os.environ.get("WRITE_BATCH_SIZE", "32"))
+
+# 지연 쓰기 모드 (하루 일정 저장을 메모리에 모았다가 주기적으로 한 번에 기록)
+# 대기 중인 상태는 프로세스 메모리에만 있으므로 워커 하나로 실행할 때만 사용
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_FLUSH_MS = int(os.environ.get("WRITE_BEHIND_FLUSH_MS", "200"))
+WRITE_BEHIND_JOURNAL = os.environ.get("WRITE_BEHIND_JOURNAL", "./write_behind.journal")
+
+logger = logging.getLogger(__name__)
+hash_slots = None
+
 # JWT 설정
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# CSV 내보내기 시 한 번에 가져와 전송하는 행 수
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "500"))
+
+# 상세 내보내기 gzip 압축 수준 (속도 우선)
+EXPORT_GZIP_LEVEL = int(os.environ.get("EXPORT_GZIP_LEVEL", "6"))
+
+# 백그라운드 내보내기 설정 (결과 파일 상위 위치, 동시 실행 수, 보관 시간, 정리 주기)
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "schedule_exports"))
+EXPORT_JOB_CONCURRENCY = int(os.environ.get("EXPORT_JOB_CONCURRENCY", "1"))
+EXPORT_JOB_TTL_SECONDS = int(os.environ.get("EXPORT_JOB_TTL_SECONDS", "3600"))
+EXPORT_CLEANUP_INTERVAL_SECONDS = int(os.environ.get("EXPORT_CLEANUP_INTERVAL_SECONDS", "60"))
+
+# 인증 사용자 캐시 설정 (최대 항목 수, 유지 시간)
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = int(os.environ.get("USER_CACHE_TTL_SECONDS", "300"))
+
+# 인증된 사용자 정보 (DB 세션과 무관하게 캐시에 보관)
+CurrentUser = namedtuple("CurrentUser", ["id", "username"])
+
+# 인증 사용자 캐시 (토큰 subject 기준 TTL + LRU, 토큰 만료 시각을 넘기지 않음)
+class UserCache:
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, username: str):
+        entry = self.entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[username]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(username)
+        self.hits += 1
+        return user
+
+    def put(self, username: str, user: CurrentUser, token_expires_at: float):
+        expires_at = min(time.time() + self.ttl_seconds, token_expires_at)
+        self.entries[username] = (user, expires_at)
+        self.entries.move_to_end(username)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, username: str):
+        if self.entries.pop(username, None) is not None:
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+# 사용자/연도별 완료 비트셋 캐시 설정 (다른 워커의 저장은 TTL이 지나야 반영)
+YEAR_BITSET_CACHE_SIZE = int(os.environ.get("YEAR_BITSET_CACHE_SIZE", "4096"))
+YEAR_BITSET_CACHE_TTL_SECONDS = int(os.environ.get("YEAR_BITSET_CACHE_TTL_SECONDS", "300"))
+
 app = FastAPI()
 
 templates = Jinja2Templates(directory="templates")
@@ -54,13 +470,819 @@ templates = Jinja2Templates(directory="templates")
 # 정적 파일 설정
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# 데이터베이스 의존성
-def get_db():
-    db = SessionLocal()
-    try:
+# 데이터베이스 의존성 (비동기 세션)
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+# 사용자 이름으로 사용자 조회
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+# 선택한 사용자 조회 (사용자 이름 순)
+async def get_users_by_ids(db: AsyncSession, user_ids):
+    result = await db.execute(select(User.id, User.username).where(user_ids_filter(User.id, user_ids)).order_by(User.username))
+    return result.all()
+
+# 한 번에 돌려주는 사용자 검색 결과 최대 수
+USER_SEARCH_LIMIT = 50
+
+# 사용자 이름 접두어 검색 쿼리 (username 인덱스 범위 조회, 대소문자 구분)
+# after 다음 이름부터 limit개 (keyset 페이지)
+def select_users_by_prefix(prefix: str, after: str, limit: int):
+    stmt = select(User.id, User.username)
+    if prefix:
+        stmt = stmt.where(User.username >= prefix, User.username < prefix + "\U0010ffff")
+    if after:
+        stmt = stmt.where(User.username > after)
+    return stmt.order_by(User.username).limit(limit)
+
+# 하루 일정 항목 (두 저장 방식 공통 형태)
+DayEntry = namedtuple("DayEntry", ["activity_id", "description", "completed"])
+
+# 활동 번호에 해당하는 비트
+def activity_bit(activity_id: int):
+    return 1 << (activity_id - 1)
+
+# 특정 날짜의 일정 조회 쿼리
+def select_day_schedules(user_id: int, schedule_date: dt_date):
+    return select(Schedule).where(Schedule.date == schedule_date, Schedule.user_id == user_id)
+
+# 특정 날짜의 하루 기록 조회 쿼리 (compact 모드)
+def select_day_record(user_id: int, schedule_date: dt_date):
+    return select(DayRecord.completed_mask).where(DayRecord.user_id == user_id, DayRecord.date == schedule_date)
+
+# 특정 날짜의 활동 내용 조회 쿼리 (compact 모드)
+def select_day_descriptions(user_id: int, schedule_date: dt_date):
+    return select(DayDescription.activity_id, DayDescription.description).where(
+        DayDescription.user_id == user_id, DayDescription.date == schedule_date
+    )
+
+# 특정 날짜의 일정 조회 (활동 카탈로그 순서, 저장되지 않은 활동은 None)
+async def get_day_schedules(db: AsyncSession, user_id: int, schedule_date: dt_date):
+    if STORAGE_MODE == "compact":
+        mask = (await db.execute(select_day_record(user_id, schedule_date))).scalar()
+        by_activity = {}
+        if mask is not None:
+            descriptions = dict((await db.execute(select_day_descriptions(user_id, schedule_date))).all())
+            by_activity = {
+                activity.id: DayEntry(activity.id, descriptions.get(activity.id, ""), bool(mask & activity_bit(activity.id)))
+                for activity in ACTIVITY_CATALOG
+            }
+    else:
+        result = await db.execute(select_day_schedules(user_id, schedule_date))
+        by_activity = {
+            schedule.activity_id: DayEntry(schedule.activity_id, schedule.description, schedule.completed)
+            for schedule in result.scalars()
+        }
+    # 지연 쓰기 모드에서 아직 기록되지 않은 활동은 그 상태를 우선
+    pending = write_behind.lookup(user_id, schedule_date) if WRITE_BEHIND else None
+    for row in pending or ():
+        by_activity[row["activity_id"]] = DayEntry(row["activity_id"], row["description"], row["completed"])
+    return [by_activity.get(activity.id) for activity in ACTIVITY_CATALOG]
+
+# 일정 저장 쿼리 (INSERT ... ON CONFLICT DO UPDATE, 행 목록과 함께 executemany로 실행)
+# 내용이 그대로인 행은 갱신하지 않아 updated_at/row_version이 실제 변경에만 바뀜
+def upsert_schedules_stmt():
+    stmt = sqlite_insert(Schedule)
+    return stmt.on_conflict_do_update(
+        index_elements=[Schedule.user_id, Schedule.date, Schedule.activity_id],
+        set_={
+            "description": stmt.excluded.description,
+            "completed": stmt.excluded.completed,
+            "updated_at": stmt.excluded.updated_at,
+            "row_version": Schedule.row_version + literal_column("1"),
+        },
+        where=or_(
+            Schedule.description.is_distinct_from(stmt.excluded.description),
+            Schedule.completed.is_distinct_from(stmt.excluded.completed),
+        ),
+    )
+
+# 하루 기록 저장 쿼리 (compact 모드: 이번에 저장하는 활동의 비트만 교체)
+def upsert_day_records_stmt():
+    stmt = sqlite_insert(DayRecord).values(
+        user_id=bindparam("user_id", type_=Integer),
+        date=bindparam("date", type_=Date),
+        completed_mask=bindparam("mask", type_=Integer),
+        updated_at=bindparam("updated_at", type_=DateTime),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DayRecord.user_id, DayRecord.date],
+        set_={
+            "completed_mask": DayRecord.completed_mask.bitwise_and(bindparam("keep", type_=Integer))
+            .bitwise_or(stmt.excluded.completed_mask),
+        },
+    )
+
+# 일정 저장 (compact 모드): 날짜별 비트마스크 upsert, 내용은 입력된 것만 보관
+def save_compact_rows(conn, rows, updated_at):
+    days = {}
+    for row in rows:
+        touched, mask = days.get((row["user_id"], row["date"]), (0, 0))
+        bit = activity_bit(row["activity_id"])
+        days[(row["user_id"], row["date"])] = (touched | bit, mask | bit if row["completed"] else mask)
+    conn.execute(upsert_day_records_stmt(), [
+        {"user_id": user_id, "date": day, "mask": mask, "keep": ~touched, "updated_at": updated_at}
+        for (user_id, day), (touched, mask) in days.items()
+    ])
+    described = [row for row in rows if row["description"]]
+    if described:
+        stmt = sqlite_insert(DayDescription).values([
+            {key: row[key] for key in ("user_id", "date", "activity_id", "description")}
+            for row in described
+        ])
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[DayDescription.user_id, DayDescription.date, DayDescription.activity_id],
+            set_={"description": stmt.excluded.description},
+        ))
+    cleared = [row for row in rows if not row["description"]]
+    if cleared:
+        conn.execute(
+            delete(DayDescription).where(
+                DayDescription.user_id == bindparam("b_user_id", type_=Integer),
+                DayDescription.date == bindparam("b_date", type_=Date),
+                DayDescription.activity_id == bindparam("b_activity_id", type_=Integer),
+            ),
+            [{"b_user_id": row["user_id"], "b_date": row["date"], "b_activity_id": row["activity_id"]} for row in cleared],
+        )
+
+# 사용자/날짜/활동별 완료 여부 쿼리 (일별 집계 원본, compact 모드는 비트 연산으로 계산)
+def select_day_completions(storage_mode=None):
+    if (storage_mode or STORAGE_MODE) == "compact":
+        completed = DayRecord.completed_mask.bitwise_rshift(Activity.id - 1).bitwise_and(1) == 1
+        return (
+            select(DayRecord.user_id, DayRecord.date, Activity.id, func.count())
+            .select_from(DayRecord)
+            .join(Activity, completed)
+            .group_by(DayRecord.user_id, DayRecord.date, Activity.id)
+        ), DayRecord
+    return (
+        select(Schedule.user_id, Schedule.date, Schedule.activity_id, func.count())
+        .where(Schedule.completed == True)
+        .group_by(Schedule.user_id, Schedule.date, Schedule.activity_id)
+    ), Schedule
+
+# 해당 월의 마지막 날
+def month_end(day: dt_date):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+# 일정 변경 후 해당 날짜/월의 집계 다시 계산 (저장과 같은 트랜잭션에서 실행)
+# (사용자, 날짜) 묶음마다 일별, 월별 각각 DELETE 한 번 + INSERT ... SELECT 한 번
+def refresh_rollups(conn, user_days):
+    for batch in user_days_batches(user_days):
+        refresh_rollups_batch(conn, batch)
+
+def refresh_rollups_batch(conn, user_days):
+    completions, source = select_day_completions()
+    conn.execute(delete(DailyRollup).where(user_days_clause(DailyRollup.user_id, DailyRollup.day, user_days)))
+    conn.execute(insert(DailyRollup).from_select(
+        ["user_id", "day", "activity_id", "completed_count"],
+        completions.where(user_days_clause(source.user_id, source.date, user_days)),
+    ))
+    user_months = sorted({(user_id, day.replace(day=1)) for user_id, day in user_days})
+    conn.execute(delete(MonthlyRollup).where(user_days_clause(MonthlyRollup.user_id, MonthlyRollup.month, user_months)))
+    # 사용자마다 OR 항 하나: 바뀐 첫 달~마지막 달 범위를 인덱스로 읽고 그중 바뀐 달만 다시 합산
+    months_by_user = {}
+    for user_id, first_day in user_months:
+        months_by_user.setdefault(user_id, []).append(first_day)
+    month = func.date(DailyRollup.day, "start of month")
+    conn.execute(insert(MonthlyRollup).from_select(
+        ["user_id", "month", "activity_id", "completed_count"],
+        select(DailyRollup.user_id, month, DailyRollup.activity_id, func.sum(DailyRollup.completed_count))
+        .where(or_(*(
+            and_(
+                DailyRollup.user_id == user_id,
+                DailyRollup.day >= months[0],
+                DailyRollup.day <= month_end(months[-1]),
+                month.in_([first_day.isoformat() for first_day in months]),
+            )
+            for user_id, months in months_by_user.items()
+        )))
+        .group_by(DailyRollup.user_id, month, DailyRollup.activity_id),
+    ))
+
+# 전체 집계 테이블 재생성 (기존 데이터 이관 및 scripts/rebuild_rollups.py 용)
+def rebuild_rollups(conn, storage_mode=None):
+    conn.execute(delete(DailyRollup))
+    conn.execute(delete(MonthlyRollup))
+    conn.execute(insert(DailyRollup).from_select(
+        ["user_id", "day", "activity_id", "completed_count"],
+        select_day_completions(storage_mode)[0],
+    ))
+    month = func.date(DailyRollup.day, "start of month")
+    conn.execute(insert(MonthlyRollup).from_select(
+        ["user_id", "month", "activity_id", "completed_count"],
+        select(DailyRollup.user_id, month, DailyRollup.activity_id, func.sum(DailyRollup.completed_count))
+        .group_by(DailyRollup.user_id, month, DailyRollup.activity_id),
+    ))
+
+# 한 문장의 (사용자, 날짜) 조건에 넣는 최대 사용자 수와 날짜 수
+# 사용자마다 OR 항이 하나씩 늘어나므로 SQLite 식 깊이 제한(1000)과 변수 개수 제한 아래로 유지
+USER_DAYS_BATCH_USERS = 200
+USER_DAYS_BATCH_DAYS = 5000
+
+# (사용자, 날짜) 목록을 사용자 순서대로 위 제한 안의 묶음으로 나눔
+def user_days_batches(user_days):
+    batch, users = [], set()
+    for user_id, day in sorted(set(user_days)):
+        if batch and (len(batch) >= USER_DAYS_BATCH_DAYS or (user_id not in users and len(users) >= USER_DAYS_BATCH_USERS)):
+            yield batch
+            batch, users = [], set()
+        batch.append((user_id, day))
+        users.add(user_id)
+    if batch:
+        yield batch
+
+# (사용자, 날짜) 목록 조건: 사용자별 user_id = ? AND date IN (...) (인덱스 탐색 유지)
+# 사용자 수만큼 OR 항이 생기므로 user_days_batches로 나눈 묶음 단위로 사용
+def user_days_clause(user_column, date_column, user_days):
+    dates_by_user = {}
+    for user_id, day in sorted(set(user_days)):
+        dates_by_user.setdefault(user_id, []).append(day)
+    return or_(*(
+        and_(user_column == user_id, date_column.in_(dates))
+        for user_id, dates in dates_by_user.items()
+    ))
+
+# 저장 전 날짜별 일정 상태 쿼리 (rows 모드)
+def select_day_states(user_days):
+    return (
+        select(Schedule.user_id, Schedule.date, Schedule.activity_id, Schedule.description, Schedule.completed)
+        .where(user_days_clause(Schedule.user_id, Schedule.date, user_days))
+    )
+
+# 저장 전 날짜별 일정 상태: {(user_id, date): {activity_id: (내용, 완료 여부)}}
+def read_day_states(conn, user_days):
+    states = {}
+    for batch in user_days_batches(user_days):
+        states.update(read_day_states_batch(conn, batch))
+    return states
+
+def read_day_states_batch(conn, keys):
+    states = {key: {} for key in keys}
+    if STORAGE_MODE == "compact":
+        masks = conn.execute(
+            select(DayRecord.user_id, DayRecord.date, DayRecord.completed_mask)
+            .where(user_days_clause(DayRecord.user_id, DayRecord.date, keys))
+        )
+        for user_id, day, mask in masks:
+            states[(user_id, day)] = {
+                activity.id: ("", bool(mask & activity_bit(activity.id))) for activity in ACTIVITY_CATALOG
+            }
+        descriptions = conn.execute(
+            select(DayDescription.user_id, DayDescription.date, DayDescription.activity_id, DayDescription.description)
+            .where(user_days_clause(DayDescription.user_id, DayDescription.date, keys))
+        )
+        for user_id, day, activity_id, description in descriptions:
+            day_state = states[(user_id, day)]
+            day_state[activity_id] = (description, day_state.get(activity_id, ("", False))[1])
+        return states
+    result = conn.execute(select_day_states(keys))
+    for user_id, day, activity_id, description, completed in result:
+        states[(user_id, day)][activity_id] = (description or "", bool(completed))
+    return states
+
+# 실제로 달라진 일정만 변경 기록에 추가 (저장과 같은 트랜잭션), 추가한 변경 목록 반환
+def record_schedule_changes(conn, rows, before, changed_at):
+    changes = []
+    for row in rows:
+        previous = before[(row["user_id"], row["date"])].get(row["activity_id"])
+        current = (row["description"] or "", bool(row["completed"]))
+        if previous == current:
+            continue
+        changes.append({
+            "op": "insert" if previous is None else "update",
+            "user_id": row["user_id"],
+            "date": row["date"],
+            "activity_id": row["activity_id"],
+            "description": current[0],
+            "completed": current[1],
+            "changed_at": changed_at,
+        })
+    if changes:
+        conn.execute(insert(ScheduleChange), changes)
+    return changes
+
+# 사용자 변경분 조회 쿼리 ((updated_at, id)가 cursor 다음인 것부터 limit개)
+# compact 모드는 하루 기록 단위로 읽음
+def select_schedule_deltas(user_id: int, cursor, limit: int):
+    if STORAGE_MODE == "compact":
+        model = DayRecord
+        stmt = select(DayRecord.id, DayRecord.date, DayRecord.completed_mask, DayRecord.updated_at, DayRecord.row_version)
+    else:
+        model = Schedule
+        stmt = select(
+            Schedule.id, Schedule.date, Schedule.activity_id, Schedule.description, Schedule.completed,
+            Schedule.updated_at, Schedule.row_version,
+        )
+    stmt = stmt.where(model.user_id == user_id)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(model.updated_at, model.id) > tuple_(literal(cursor[0], DateTime), literal(cursor[1], Integer)))
+    return stmt.order_by(model.updated_at, model.id).limit(limit)
+
+# 변경 기록 조회 쿼리 (since 이후 seq 순서로 limit개)
+def select_schedule_changes(since: int, limit: int):
+    return select(ScheduleChange).where(ScheduleChange.seq > since).order_by(ScheduleChange.seq).limit(limit)
+
+# 일정 저장: upsert 후 같은 트랜잭션에서 변경 기록 및 집계 갱신, 실제 변경 목록 반환
+def save_schedule_rows(conn, rows):
+    now = datetime.utcnow()
+    user_days = [(row["user_id"], row["date"]) for row in rows]
+    before = read_day_states(conn, user_days)
+    if STORAGE_MODE == "compact":
+        save_compact_rows(conn, rows, now)
+    else:
+        conn.execute(upsert_schedules_stmt(), [{**row, "updated_at": now} for row in rows])
+    changes = record_schedule_changes(conn, rows, before, now)
+    if STORAGE_MODE == "compact":
+        # 기존 하루 기록 중 실제로 바뀐 날만 변경 시각/버전 갱신
+        updated_days = [(change["user_id"], change["date"]) for change in changes if change["op"] == "update"]
+        for batch in user_days_batches(updated_days):
+            conn.execute(
+                update(DayRecord)
+                .where(user_days_clause(DayRecord.user_id, DayRecord.date, batch))
+                .values(updated_at=now, row_version=DayRecord.row_version + 1)
+            )
+    refresh_rollups(conn, user_days)
+    bump_data_versions(conn, {change["user_id"] for change in changes})
+    return changes
+
+# 일정이 바뀐 사용자의 데이터 버전 증가 (저장과 같은 트랜잭션)
+def bump_data_versions(conn, user_ids):
+    if not user_ids:
+        return
+    stmt = sqlite_insert(UserDataVersion).values(user_id=bindparam("user_id", type_=Integer), version=1)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserDataVersion.user_id],
+            set_={"version": UserDataVersion.version + literal_column("1")},
+        ),
+        [{"user_id": user_id} for user_id in sorted(user_ids)],
+    )
+
+# 사용자 추가 (쓰기 전용 스레드에서 실행)
+def insert_user(conn, username: str, hashed_password: str):
+    return conn.execute(insert(User).values(username=username, hashed_password=hashed_password)).inserted_primary_key[0]
+
+# 단일 쓰기 스레드: 연결 하나를 소유하고 대기열의 쓰기 작업을 묶음 트랜잭션으로 커밋
+# 작업마다 SAVEPOINT를 두어 실패한 작업만 되돌리고, 커밋 후 호출한 쪽의 future를 완료
+class SingleWriter:
+    def __init__(self, engine, batch_size: int):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.ops = 0
+        self.batches = 0
+        self.failed_ops = 0
+        self.largest_batch = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="sqlite-writer", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        self.queue.put(None)
+        await asyncio.to_thread(self.thread.join)
+
+    # 쓰기 작업 제출: fn(conn, *args)의 결과를 기다림
+    async def submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put((fn, args, future, loop))
+        return await future
+
+    # 대기 중인 작업을 최대 batch_size개까지 모음 (stop 신호를 만나면 멈춤)
+    def next_batch(self):
+        item = self.queue.get()
+        if item is None:
+            return None, True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def run(self):
+        with self.engine.connect() as conn:
+            stopping = False
+            while not stopping:
+                batch, stopping = self.next_batch()
+                if batch:
+                    self.commit_batch(conn, batch)
+
+    def commit_batch(self, conn, batch):
+        outcomes = []
+        try:
+            with conn.begin():
+                # 처음부터 쓰기 잠금을 잡아 다른 프로세스와의 잠금 승격 충돌을 피함
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                for fn, args, future, loop in batch:
+                    savepoint = conn.begin_nested()
+                    try:
+                        outcomes.append((fn(conn, *args), None))
+                        savepoint.commit()
+                    except Exception as exc:
+                        savepoint.rollback()
+                        outcomes.append((None, exc))
+        except Exception as exc:
+            outcomes = [(None, exc)] * len(batch)
+        self.ops += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (fn, args, future, loop), (result, exc) in zip(batch, outcomes):
+            if exc is not None:
+                self.failed_ops += 1
+            loop.call_soon_threadsafe(self.resolve, future, result, exc)
+
+    @staticmethod
+    def resolve(future, result, exc):
+        if future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "ops": self.ops,
+            "batches": self.batches,
+            "failed_ops": self.failed_ops,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.ops / self.batches, 2) if self.batches else 0.0,
+        }
+
+db_writer = SingleWriter(engine, WRITE_BATCH_SIZE)
+
+# 지연 쓰기 버퍼: (사용자, 날짜)별 마지막 저장 상태만 보관하고 주기적으로 모아서 기록
+# 저장마다 저널 파일에 fsync로 먼저 남기고, 기록이 끝난 저널 구간은 삭제 (시작 시 남은 구간을 재생)
+class WriteBehindBuffer:
+    def __init__(self, journal_path: str, flush_interval_ms: int):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval_ms / 1000
+        self.pending = {}
+        self.flushing = {}
+        self.lock = threading.Lock()
+        self.flush_lock = asyncio.Lock()
+        self.segment = 0
+        self.journal = None
+        self.task = None
+        self.saves = 0
+        self.flushes = 0
+        self.flushed_days = 0
+        self.failed_flushes = 0
+        self.flush_ms_last = 0.0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.lag_ms_max = 0.0
+
+    def segment_path(self, segment: int):
+        return f"{self.journal_path}.{segment}"
+
+    # 남아 있는 저널 구간 번호 (오래된 순)
+    def existing_segments(self):
+        segments = []
+        for path in glob.glob(glob.escape(self.journal_path) + ".*"):
+            suffix = path.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                segments.append(int(suffix))
+        return sorted(segments)
+
+    def remove_segments(self, up_to: int):
+        for segment in self.existing_segments():
+            if segment <= up_to:
+                os.remove(self.segment_path(segment))
+
+    def open_segment(self):
+        self.journal = open(self.segment_path(self.segment), "a", encoding="utf-8")
+
+    # 저널 재생: 날짜별 마지막 상태만 남김 (기록 도중 잘린 마지막 줄은 무시)
+    def read_journal(self):
+        days = {}
+        for segment in self.existing_segments():
+            with open(self.segment_path(segment), encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        rows = json.loads(line)
+                    except ValueError:
+                        continue
+                    for row in rows:
+                        row["date"] = dt_date.fromisoformat(row["date"])
+                    for key, day_rows in self.group_by_day(rows).items():
+                        days[key] = self.merge_day_rows(days.get(key, []), day_rows)
+        return days
+
+    @staticmethod
+    def group_by_day(rows):
+        days = {}
+        for row in rows:
+            days.setdefault((row["user_id"], row["date"]), []).append(row)
+        return days
+
+    # 같은 날짜를 다시 저장하면 활동별로 합침 (일부 활동만 저장하는 요청도 앞선 활동을 잃지 않음)
+    @staticmethod
+    def merge_day_rows(previous, day_rows):
+        merged = {row["activity_id"]: row for row in previous}
+        merged.update((row["activity_id"], row) for row in day_rows)
+        return list(merged.values())
+
+    # 시작 시 남은 저널을 DB에 반영한 뒤 새 저널 구간으로 시작
+    async def start(self):
+        days = await asyncio.to_thread(self.read_journal)
+        if days:
+            await db_writer.submit(save_schedule_rows, [row for rows in days.values() for row in rows])
+            logger.info("write-behind journal replayed: %d days", len(days))
+        segments = self.existing_segments()
+        if segments:
+            self.remove_segments(segments[-1])
+        self.segment = (segments[-1] if segments else 0) + 1
+        self.open_segment()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.task.cancel()
+        await self.flush()
+        self.journal.close()
+        if not self.pending:
+            os.remove(self.segment_path(self.segment))
+
+    # 저널에 fsync로 기록한 뒤 대기 상태 갱신 (스레드에서 실행, 구간 교체와 같은 잠금 사용)
+    def append(self, rows):
+        line = json.dumps([{**row, "date": row["date"].isoformat()} for row in rows], ensure_ascii=False)
+        with self.lock:
+            self.journal.write(line + "\n")
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            now = time.monotonic()
+            for key, day_rows in self.group_by_day(rows).items():
+                previous = self.pending.get(key)
+                if previous:
+                    day_rows = self.merge_day_rows(previous[0], day_rows)
+                self.pending[key] = (day_rows, previous[1] if previous else now)
+            self.saves += 1
+
+    async def put(self, rows):
+        await asyncio.to_thread(self.append, rows)
+
+    # 아직 기록되지 않은 하루 일정 (DB에 쓰는 중인 것 포함, 없으면 None)
+    def lookup(self, user_id: int, schedule_date: dt_date):
+        entry = self.pending.get((user_id, schedule_date)) or self.flushing.get((user_id, schedule_date))
+        return entry[0] if entry else None
+
+    # 사용자의 기간 안에 아직 기록되지 않은 일정 행 (DB에 쓰는 중인 것 다음에 대기 중인 것 순서)
+    # rotate()가 flushing을 먼저 바꾸므로 pending을 먼저 읽어야 교체 도중에도 빠지는 날짜가 없음
+    def pending_rows(self, user_id: int, start: dt_date, end: dt_date):
+        pending = self.pending
+        flushing = self.flushing
+        return [
+            row
+            for entries in (flushing, pending)
+            for (key_user, day), (day_rows, _) in list(entries.items())
+            if key_user == user_id and start <= day <= end
+            for row in day_rows
+        ]
+
+    # 사용자의 기간 안에 아직 기록되지 않은 날짜가 있는지 (DB에 쓰는 중인 것 포함)
+    def has_pending(self, user_id: int, start: dt_date, end: dt_date):
+        return any(
+            key_user == user_id and start <= day <= end
+            for entries in (self.pending, self.flushing)
+            for key_user, day in list(entries)
+        )
+
+    # 대기 상태를 떼어내고 저널을 다음 구간으로 교체 (떼어낸 상태는 기록이 끝날 때까지 조회 가능)
+    def rotate(self):
+        with self.lock:
+            # 떼어낼 상태를 먼저 flushing에 올려 두어 교체 도중에도 조회에서 빠지지 않게 함
+            self.flushing = snapshot = self.pending
+            self.pending = {}
+            self.journal.close()
+            flushed_segment = self.segment
+            self.segment += 1
+            self.open_segment()
+        return snapshot, flushed_segment
+
+    # 진행 중인 기록이 있으면 끝날 때까지 기다린 뒤 남은 대기 상태를 기록
+    async def flush(self):
+        async with self.flush_lock:
+            await self.flush_pending()
+
+    async def flush_pending(self):
+        if not self.pending:
+            return
+        snapshot, flushed_segment = await asyncio.to_thread(self.rotate)
+        started = time.monotonic()
+        try:
+            await db_writer.submit(save_schedule_rows, [row for rows, _ in snapshot.values() for row in rows])
+        except Exception:
+            # 실패하면 그 사이 새로 저장된 상태와 활동별로 합쳐 되돌려 놓음 (새 상태 우선, 저널 구간도 유지)
+            with self.lock:
+                for key, (day_rows, first_saved) in snapshot.items():
+                    current = self.pending.get(key)
+                    if current:
+                        day_rows = self.merge_day_rows(day_rows, current[0])
+                        first_saved = min(first_saved, current[1])
+                    self.pending[key] = (day_rows, first_saved)
+            self.failed_flushes += 1
+            raise
+        finally:
+            self.flushing = {}
+        finished = time.monotonic()
+        await asyncio.to_thread(self.remove_segments, flushed_segment)
+        elapsed_ms = (finished - started) * 1000
+        self.flushes += 1
+        self.flushed_days += len(snapshot)
+        self.flush_ms_last = elapsed_ms
+        self.flush_ms_total += elapsed_ms
+        self.flush_ms_max = max(self.flush_ms_max, elapsed_ms)
+        oldest = min(first_saved for _, first_saved in snapshot.values())
+        self.lag_ms_max = max(self.lag_ms_max, (finished - oldest) * 1000)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("write-behind flush failed")
+
+    def stats(self):
+        return {
+            "pending_days": len(self.pending),
+            "saves": self.saves,
+            "flushes": self.flushes,
+            "flushed_days": self.flushed_days,
+            "failed_flushes": self.failed_flushes,
+            "coalescing_ratio": round(self.saves / self.flushed_days, 2) if self.flushed_days else 0.0,
+            "flush_ms_last": round(self.flush_ms_last, 2),
+            "flush_ms_avg": round(self.flush_ms_total / self.flushes, 2) if self.flushes else 0.0,
+            "flush_ms_max": round(self.flush_ms_max, 2),
+            "lag_ms_max": round(self.lag_ms_max, 2),
+        }
+
+write_behind = WriteBehindBuffer(WRITE_BEHIND_JOURNAL, WRITE_BEHIND_FLUSH_MS)
+
+# 기간을 월 집계로 읽을 구간과 일 집계로 읽을 가장자리 구간으로 분할
+def split_range_by_month(start: dt_date, end: dt_date):
+    first_full = start if start.day == 1 else month_end(start) + timedelta(days=1)
+    last_full = end if end == month_end(end) else end.replace(day=1) - timedelta(days=1)
+    if first_full > last_full:
+        return None, [(start, end)]
+    edges = []
+    if start < first_full:
+        edges.append((start, first_full - timedelta(days=1)))
+    if last_full < end:
+        edges.append((last_full + timedelta(days=1), end))
+    return (first_full, last_full.replace(day=1)), edges
+
+# 전체 사용자 선택 값 (사용자 번호 목록 대신 전달)
+ALL_USERS = "all"
+
+# 사용자 조건: 전체 사용자는 users 하위 쿼리, 번호 목록은 JSON 배열 하나를 json_each로 펼침
+# 선택 인원과 상관없이 SQL 문장이 같아 문장 캐시를 다시 쓰고 SQLite 변수 개수 제한에도 걸리지 않음
+def user_ids_filter(column, user_ids):
+    if user_ids == ALL_USERS:
+        return column.in_(select(User.id))
+    if len(user_ids) == 1:
+        return column == int(user_ids[0])
+    ids = func.json_each(literal(json.dumps([int(user_id) for user_id in user_ids]), String)).table_valued("value")
+    return column.in_(select(ids.c.value))
+
+# 폼의 사용자 선택: 전체 사용자 체크 시 ALL_USERS, 아니면 중복 없는 사용자 번호 목록
+def parse_user_selection(form):
+    if form.get("all_users"):
+        return ALL_USERS
+    try:
+        return sorted({int(user_id) for user_id in form.getlist("user_ids")})
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="사용자 선택이 올바르지 않습니다.")
+
+# 기간 내 사용자/활동별 완료 횟수 집계 쿼리 (월 집계 + 가장자리 일 집계)
+def select_activity_counts(user_ids, start: dt_date, end: dt_date):
+    months, edges = split_range_by_month(start, end)
+    parts = []
+    if months:
+        parts.append(
+            select(MonthlyRollup.user_id, MonthlyRollup.activity_id, MonthlyRollup.completed_count)
+            .where(
+                user_ids_filter(MonthlyRollup.user_id, user_ids),
+                MonthlyRollup.month >= months[0],
+                MonthlyRollup.month <= months[1],
+            )
+        )
+    for edge_start, edge_end in edges:
+        parts.append(
+            select(DailyRollup.user_id, DailyRollup.activity_id, DailyRollup.completed_count)
+            .where(
+                user_ids_filter(DailyRollup.user_id, user_ids),
+                DailyRollup.day >= edge_start,
+                DailyRollup.day <= edge_end,
+            )
+        )
+    counts = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+    return (
+        select(counts.c.user_id, counts.c.activity_id, func.sum(counts.c.completed_count))
+        .group_by(counts.c.user_id, counts.c.activity_id)
+    )
+
+# 사용자별 완료 횟수 행 쿼리 (사용자 순으로 정렬, 완료 기록 없는 사용자도 포함)
+def select_user_count_rows(user_ids, start: dt_date, end: dt_date):
+    counts = select_activity_counts(user_ids, start, end).subquery()
+    return (
+        select(User.id, User.username, counts.c.activity_id, counts.c[2])
+        .outerjoin(counts, counts.c.user_id == User.id)
+        .where(user_ids_filter(User.id, user_ids))
+        .order_by(User.id)
+    )
+
+# 기간 내 날짜별 상세 일정 쿼리: (사용자 이름, 날짜, 활동 번호, 내용, 완료 여부)
+# compact 모드는 하루 기록과 활동 카탈로그를 교차 결합해 행 단위로 펼침
+def select_detail_rows(user_ids, start: dt_date, end: dt_date):
+    if STORAGE_MODE == "compact":
+        completed = DayRecord.completed_mask.bitwise_rshift(Activity.id - 1).bitwise_and(1) == 1
+        return (
+            select(User.username, DayRecord.date, Activity.id, func.coalesce(DayDescription.description, ""), completed)
+            .select_from(DayRecord)
+            .join(User, User.id == DayRecord.user_id)
+            .join(Activity, true())
+            .outerjoin(DayDescription, and_(
+                DayDescription.user_id == DayRecord.user_id,
+                DayDescription.date == DayRecord.date,
+                DayDescription.activity_id == Activity.id,
+            ))
+            .where(user_ids_filter(DayRecord.user_id, user_ids), DayRecord.date >= start, DayRecord.date <= end)
+            .order_by(DayRecord.user_id, DayRecord.date, Activity.id)
+        )
+    return (
+        select(User.username, Schedule.date, Schedule.activity_id, Schedule.description, Schedule.completed)
+        .join(User, User.id == Schedule.user_id)
+        .where(user_ids_filter(Schedule.user_id, user_ids), Schedule.date >= start, Schedule.date <= end)
+        .order_by(Schedule.user_id, Schedule.date, Schedule.activity_id)
+    )
+
+# 사용자 x 활동 완료 횟수 행렬 (사용자 순서, 활동은 카탈로그 순서)
+# 횟수는 행 우선으로 array('I') 하나에 담아 사용자당 활동 수 x 4바이트만 사용
+class ActivityMatrix:
+    def __init__(self, width: int):
+        self.width = width
+        self.user_ids = array("I")
+        self.usernames = []
+        self.counts = array("I")
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def add_row(self, user_id: int, username: str, counts):
+        self.user_ids.append(user_id)
+        self.usernames.append(username)
+        self.counts.extend(counts)
+
+    # 사용자 한 명의 활동별 횟수
+    def row(self, index: int):
+        return self.counts[index * self.width:(index + 1) * self.width].tolist()
+
+    # (user_id, 사용자 이름, 활동별 횟수) 순회
+    def rows(self):
+        for index, (user_id, username) in enumerate(zip(self.user_ids, self.usernames)):
+            yield user_id, username, self.row(index)
+
+    # 활동별 전체 합계 (그래프용)
+    def activity_totals(self):
+        return [sum(self.counts[position::self.width]) for position in range(self.width)]
+
+# 기간 내 사용자별 완료 횟수: (user_id, 사용자 이름, 카탈로그 순서 횟수 목록)을 사용자 순서로
+# 사용자 이름까지 그룹 집계 쿼리 한 번을 서버 측 커서로 EXPORT_CHUNK_SIZE 행씩 읽어 사용자 단위로 접음
+async def iter_user_counts(db: AsyncSession, user_ids, start: dt_date, end: dt_date):
+    stmt = select_user_count_rows(user_ids, start, end).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    result = await db.stream(stmt)
+    current = None
+    async for partition in result.partitions():
+        for user_id, username, activity_id, count in partition:
+            if current is None or current[0] != user_id:
+                if current is not None:
+                    yield current
+                current = (user_id, username, [0] * len(ACTIVITY_CATALOG))
+            position = ACTIVITY_POSITION.get(activity_id)
+            if position is not None:
+                current[2][position] += count
+    if current is not None:
+        yield current
+
+# 기간 내 사용자 x 활동 완료 횟수 행렬 (그래프, 비교 화면용)
+async def get_activity_matrix(db: AsyncSession, user_ids, start: dt_date, end: dt_date):
+    matrix = ActivityMatrix(len(ACTIVITY_CATALOG))
+    async for user_id, username, counts in iter_user_counts(db, user_ids, start, end):
+        matrix.add_row(user_id, username, counts)
+    return matrix
 
 # 비밀번호 해싱 함수
 def get_password_hash(password):
@@ -70,12 +1292,36 @@ def get_password_hash(password):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt 작업을 해싱 프로세스 풀에서 실행 (이벤트 루프가 멈추지 않도록)
+async def run_hash_job(func, *args):
+    if hash_executor is None:
+        return func(*args)
+    if hash_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="요청이 많습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": "1"},
+        )
+    async with hash_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor, func, *args)
+
+# 비밀번호 해싱 함수 (비동기)
+async def get_password_hash_async(password):
+    return await run_hash_job(get_password_hash, password)
+
+# 비밀번호 검증 함수 (비동기)
+async def verify_password_async(plain_password, hashed_password):
+    return await run_hash_job(verify_password, plain_password, hashed_password)
+
 # 사용자 인증 함수
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # 해싱을 기다리는 동안 DB 연결을 붙잡고 있지 않도록 반환
+    await db.close()
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
@@ -90,7 +1336,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # 토큰을 쿠키에서 추출
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
     access_token = request.cookies.get("access_token")
     if not access_token:
         raise HTTPException(
@@ -101,6 +1347,7 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     try:
         payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
+        token_expires_at = payload.get("exp")
         if username is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -113,22 +1360,28 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
             detail="인증되지 않았습니다.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(User).filter(User.username == username).first()
+    # 캐시에 있으면 DB 조회 없이 사용자 확인
+    cached_user = user_cache.get(username)
+    if cached_user is not None:
+        return cached_user
+    user = await get_user_by_username(db, username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="인증되지 않았습니다.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    current_user = CurrentUser(user.id, user.username)
+    user_cache.put(username, current_user, token_expires_at or time.time())
+    return current_user
 
 # 로그인 엔드포인트
 @app.post("/token")
-async def login_for_access_token(request: Request, db: Session = Depends(get_db)):
+async def login_for_access_token(request: Request, db: AsyncSession = Depends(get_db)):
     form = await request.form()
     username = form.get("username")
     password = form.get("password")
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user(db, username, password)
     if not user:
         # 로그인 실패 시 login.html로 유지
         return templates.TemplateResponse("login.html", {"request": request, "error": "잘못된 아이디 또는 비밀번호입니다."})
@@ -308,15 +1561,48 @@ activities_data = [
     }
 ]
 
+# 활동 카탈로그 캐시 항목
+ActivityInfo = namedtuple("ActivityInfo", ["id", "title", "description", "image", "sort_order"])
+
+# 활동 카탈로그 캐시 (시작 시 한 번 읽어 들이고 이후 변경하지 않음)
+ACTIVITY_CATALOG = ()
+ACTIVITY_TITLES = ()
+ACTIVITY_POSITION = MappingProxyType({})
+
+# 활동 카탈로그 기본 데이터 입력 (번호 1~10, 이미 있는 활동은 유지)
+def seed_activity_catalog(conn):
+    rows = [
+        {
+            "id": number,
+            "title": activity["title"],
+            "description": activity["description"],
+            "image": activity["image"],
+            "sort_order": number,
+        }
+        for number, activity in enumerate(activities_data, start=1)
+    ]
+    conn.execute(sqlite_insert(Activity).values(rows).on_conflict_do_nothing(index_elements=[Activity.id]))
+
+# 활동 카탈로그를 읽어 불변 캐시로 보관
+def load_activity_catalog(conn):
+    global ACTIVITY_CATALOG, ACTIVITY_TITLES, ACTIVITY_POSITION
+    result = conn.execute(
+        select(Activity.id, Activity.title, Activity.description, Activity.image, Activity.sort_order)
+        .order_by(Activity.sort_order, Activity.id)
+    )
+    ACTIVITY_CATALOG = tuple(ActivityInfo(*row) for row in result)
+    ACTIVITY_TITLES = tuple(activity.title for activity in ACTIVITY_CATALOG)
+    ACTIVITY_POSITION = MappingProxyType({activity.id: position for position, activity in enumerate(ACTIVITY_CATALOG)})
+
 # 메인 페이지 라우트
 @app.get("/index", response_class=HTMLResponse)
-async def read_index(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def read_index(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
             "username": current_user.username,
-            "activities": activities_data  # 활동 데이터 전달
+            "activities": ACTIVITY_CATALOG  # 활동 데이터 전달
         }
     )
 
@@ -326,18 +1612,21 @@ async def get_register(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
 @app.post("/register")
-async def post_register(request: Request, username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def post_register(request: Request, username: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db)):
     # 사용자 이름 중복 확인
-    existing_user = db.query(User).filter(User.username == username).first()
+    existing_user = await get_user_by_username(db, username)
     if existing_user:
         # 회원가입 실패 시 register.html에 오류 메시지 표시
         return templates.TemplateResponse("register.html", {"request": request, "error": "이미 존재하는 사용자 이름입니다."})
     
-    hashed_password = get_password_hash(password)
-    new_user = User(username=username, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.close()
+    hashed_password = await get_password_hash_async(password)
+    try:
+        await db_writer.submit(insert_user, username, hashed_password)
+    except IntegrityError:
+        # 중복 확인 후 다른 요청이 먼저 같은 이름으로 가입한 경우
+        return templates.TemplateResponse("register.html", {"request": request, "error": "이미 존재하는 사용자 이름입니다."})
+    user_cache.invalidate(username)
     # 회원가입 성공 시 login.html로 리다이렉트
     return RedirectResponse(url="/", status_code=303)
 
@@ -350,98 +1639,580 @@ async def logout(response: Response):
 
 # 일정 관리 페이지 라우트
 @app.get("/add_schedule", response_class=HTMLResponse)
-async def get_add_schedule(request: Request, date: str = None, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    activities = ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"]
+async def get_add_schedule(request: Request, date: str = None, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     schedules = []
     if date:
         schedule_date = dt_date.fromisoformat(date)
-        schedules = db.query(Schedule).filter(Schedule.date == schedule_date, Schedule.user_id == current_user.id).all()
-    return templates.TemplateResponse("add_schedule.html", {"request": request, "activities": activities, "schedules": schedules})
+        schedules = await get_day_schedules(db, current_user.id, schedule_date)
+    return templates.TemplateResponse("add_schedule.html", {"request": request, "activities": ACTIVITY_TITLES, "schedules": schedules})
+
+# 일정 저장 요청 (지연 쓰기 모드면 버퍼에, 아니면 쓰기 스레드로), 변경 목록 반환 (지연 쓰기는 None)
+# 저장이 끝나면 캐시된 연도 비트셋도 같은 내용으로 갱신
+async def submit_schedule_rows(rows):
+    if WRITE_BEHIND:
+        await write_behind.put(rows)
+        year_bitsets.patch(rows)
+        return None
+    changes = await db_writer.submit(save_schedule_rows, rows)
+    year_bitsets.patch(rows)
+    return changes
 
 @app.post("/add_schedule")
-async def post_add_schedule(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def post_add_schedule(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     form = await request.form()
     date_str = form.get("schedule_date")
-    activities = ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"]
+    schedules = []
     if date_str:
         schedule_date = dt_date.fromisoformat(date_str)
-        for i in range(1, 11):
-            description = form.get(f"description{i}")
-            completed = form.get(f"completed{i}") == "on"
-            existing_schedule = db.query(Schedule).filter(Schedule.date == schedule_date, Schedule.activity == f"{i}: {activities[i-1]}", Schedule.user_id == current_user.id).first()
-            if existing_schedule:
-                existing_schedule.description = description
-                existing_schedule.completed = completed
-            else:
-                new_schedule = Schedule(
-                    user_id=current_user.id,
-                    activity=f"{i}: {activities[i-1]}",
-                    description=description,
-                    date=schedule_date,
-                    completed=completed
-                )
-                db.add(new_schedule)
-        db.commit()
-    schedules = db.query(Schedule).filter(Schedule.date == schedule_date, Schedule.user_id == current_user.id).all()
-    return templates.TemplateResponse("add_schedule.html", {"request": request, "activities": activities, "schedules": schedules})
+        for i, activity in enumerate(ACTIVITY_CATALOG, start=1):
+            schedules.append({
+                "user_id": current_user.id,
+                "activity_id": activity.id,
+                "description": form.get(f"description{i}"),
+                "date": schedule_date,
+                "completed": form.get(f"completed{i}") == "on",
+            })
+        await submit_schedule_rows(schedules)
+    # 방금 저장한 내용으로 바로 화면 표시 (재조회 없음)
+    return templates.TemplateResponse("add_schedule.html", {"request": request, "activities": ACTIVITY_TITLES, "schedules": schedules})
+
+# 여러 날 일괄 저장 요청 제한 (날짜 수, 본문 크기, 내용 길이)
+BATCH_MAX_DAYS = int(os.environ.get("BATCH_MAX_DAYS", "62"))
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", str(256 * 1024)))
+BATCH_MAX_DESCRIPTION = 1000
+
+# 일괄 저장 하루치 검증: (저장할 행 목록, 오류 메시지)
+def parse_batch_day(user_id: int, day):
+    if not isinstance(day, dict):
+        return None, "날짜 항목 형식이 올바르지 않습니다."
+    try:
+        schedule_date = dt_date.fromisoformat(day.get("date"))
+    except (TypeError, ValueError):
+        return None, "날짜 형식이 올바르지 않습니다."
+    activities = day.get("activities")
+    if not isinstance(activities, list) or not activities:
+        return None, "활동 목록이 비어 있습니다."
+    rows = {}
+    for activity in activities:
+        if not isinstance(activity, dict):
+            return None, "활동 항목 형식이 올바르지 않습니다."
+        activity_id = activity.get("activity_id")
+        description = activity.get("description", "")
+        completed = activity.get("completed", False)
+        if not isinstance(activity_id, int) or activity_id not in ACTIVITY_POSITION:
+            return None, f"알 수 없는 활동 번호입니다: {activity_id}"
+        if activity_id in rows:
+            return None, f"활동 번호가 중복되었습니다: {activity_id}"
+        if not isinstance(description, str) or len(description) > BATCH_MAX_DESCRIPTION:
+            return None, "내용 형식이 올바르지 않거나 너무 깁니다."
+        if not isinstance(completed, bool):
+            return None, "완료 여부는 true/false여야 합니다."
+        rows[activity_id] = {
+            "user_id": user_id,
+            "activity_id": activity_id,
+            "description": description,
+            "date": schedule_date,
+            "completed": completed,
+        }
+    return list(rows.values()), None
+
+# 여러 날 일괄 저장 (JSON): {"days": [{"date": "YYYY-MM-DD", "activities": [{"activity_id", "description", "completed"}]}]}
+# 올바른 날짜만 한 트랜잭션으로 저장하고 날짜별 결과를 돌려줌
+@app.post("/schedules/batch")
+async def post_schedule_batch(request: Request, current_user: CurrentUser = Depends(get_current_user)):
+    if int(request.headers.get("content-length") or 0) > BATCH_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="요청이 너무 큽니다.")
+    # Content-Length가 없는 요청(chunked)도 제한을 넘는 순간 읽기를 멈춤
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="요청이 너무 큽니다.")
+    try:
+        days = json.loads(body).get("days")
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="JSON 형식이 올바르지 않습니다.")
+    if not isinstance(days, list) or not days:
+        raise HTTPException(status_code=400, detail="저장할 날짜가 없습니다.")
+    if len(days) > BATCH_MAX_DAYS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"한 번에 최대 {BATCH_MAX_DAYS}일까지 저장할 수 있습니다.")
+
+    results = []
+    rows = []
+    seen_dates = set()
+    for day in days:
+        day_rows, error = parse_batch_day(current_user.id, day)
+        if day_rows and day_rows[0]["date"] in seen_dates:
+            day_rows, error = None, "같은 날짜가 중복되었습니다."
+        if error:
+            results.append({"date": day.get("date") if isinstance(day, dict) else None, "status": "rejected", "error": error})
+            continue
+        seen_dates.add(day_rows[0]["date"])
+        rows.extend(day_rows)
+        results.append({"date": day_rows[0]["date"].isoformat(), "status": "saved", "changed": None})
+
+    if rows:
+        changes = await submit_schedule_rows(rows)
+        if changes is not None:
+            changed = {}
+            for change in changes:
+                changed[change["date"].isoformat()] = changed.get(change["date"].isoformat(), 0) + 1
+            for result in results:
+                if result["status"] == "saved":
+                    result["changed"] = changed.get(result["date"], 0)
+                    if not result["changed"]:
+                        result["status"] = "unchanged"
+
+    return {
+        "saved": sum(result["status"] != "rejected" for result in results),
+        "rejected": sum(result["status"] == "rejected" for result in results),
+        "results": results,
+    }
 
 # 일정 검색 페이지 라우트
 @app.get("/search_schedule", response_class=HTMLResponse)
-async def get_search_schedule(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    activities = ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"]
+async def get_search_schedule(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     return templates.TemplateResponse(
         "search_schedule.html",
         {
             "request": request,
             "username": current_user.username,
-            "activities": activities
+            "activities": ACTIVITY_TITLES
         }
     )
 
-@app.post("/search_schedules")
-async def search_schedules(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    form = await request.form()
-    start_date = form.get("start_date")
-    end_date = form.get("end_date")
+# ETag가 If-None-Match와 같은지 확인
+def etag_matches(request: Request, etag: str):
+    candidates = [value.strip() for value in request.headers.get("if-none-match", "").split(",")]
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+# 기간 집계 결과 캐시 설정
+AGGREGATION_CACHE_SIZE = int(os.environ.get("AGGREGATION_CACHE_SIZE", "4096"))
+
+# 기간 집계 결과 LRU 캐시: (user_id, 시작, 끝, 활동 필터) -> (데이터 버전, 결과)
+# 저장된 버전이 현재 사용자 데이터 버전과 다르면 다시 계산
+class AggregationCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key, version: int):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            if entry is not None:
+                del self.entries[key]
+                self.stale += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, version: int, data):
+        self.entries[key] = (version, data)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "evictions": self.evictions,
+        }
+
+aggregation_cache = AggregationCache(AGGREGATION_CACHE_SIZE)
+
+# 사용자 데이터 버전 조회 (저장 기록이 없으면 0)
+async def get_data_version(db: AsyncSession, user_id: int):
+    version = (await db.execute(select(UserDataVersion.version).where(UserDataVersion.user_id == user_id))).scalar()
+    return version or 0
+
+# 기간 집계 조회 (GET 쿼리 문자열과 POST 폼 공통), 활동 필터(activity_ids)가 있으면 해당 활동만
+# 데이터 버전으로 만든 ETag가 If-None-Match와 같으면 집계 없이 304
+async def search_schedules_response(request: Request, db: AsyncSession, user_id: int, params):
+    start_date = params.get("start_date")
+    end_date = params.get("end_date")
 
     if not start_date or not end_date:
         raise HTTPException(status_code=400, detail="시작 날짜와 끝 날짜를 모두 선택해야 합니다.")
 
-    start = dt_date.fromisoformat(start_date)
-    end = dt_date.fromisoformat(end_date)
+    try:
+        start = dt_date.fromisoformat(start_date)
+        end = dt_date.fromisoformat(end_date)
+        activity_ids = tuple(sorted({int(activity_id) for activity_id in params.getlist("activity_ids")})) or None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="날짜 또는 활동 형식이 올바르지 않습니다.")
 
     if start > end:
         raise HTTPException(status_code=400, detail="시작 날짜는 끝 날짜보다 빠르거나 같아야 합니다.")
+    if activity_ids and any(activity_id not in ACTIVITY_POSITION for activity_id in activity_ids):
+        raise HTTPException(status_code=400, detail="알 수 없는 활동 번호입니다.")
+
+    key = (user_id, start, end, activity_ids)
+    version = await get_data_version(db, user_id)
+    headers = {
+        "ETag": f'W/"{hashlib.blake2b(repr((key, version)).encode(), digest_size=8).hexdigest()}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = aggregation_cache.get(key, version)
+    if body is None:
+        data = (await get_activity_matrix(db, [user_id], start, end)).activity_totals()
+        positions = [ACTIVITY_POSITION[activity_id] for activity_id in activity_ids] if activity_ids else range(len(ACTIVITY_CATALOG))
+        body = json.dumps(
+            {"activities": [ACTIVITY_TITLES[position] for position in positions], "data": [data[position] for position in positions]},
+            ensure_ascii=False,
+        ).encode()
+        aggregation_cache.put(key, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/search_schedules")
+async def search_schedules_get(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    return await search_schedules_response(request, db, current_user.id, request.query_params)
+
+@app.post("/search_schedules")
+async def search_schedules(request: Request, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    return await search_schedules_response(request, db, current_user.id, await request.form())
+
+# 한 번에 돌려주는 변경분 최대 행 수
+DELTA_PAGE_LIMIT = 1000
+
+# 변경분 cursor: "<updated_at ISO>_<id>" (응답의 next_cursor를 그대로 다시 보냄)
+def parse_delta_cursor(cursor: str):
+    updated_at, _, row_id = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(updated_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다.")
+
+def format_delta_cursor(updated_at: datetime, row_id: int):
+    return f"{updated_at.isoformat()}_{row_id}"
+
+# 사용자 변경분 조회: (변경된 일정 목록, 마지막 위치, 남은 변경 여부)
+async def get_schedule_deltas(db: AsyncSession, user_id: int, cursor, limit: int):
+    if STORAGE_MODE == "compact":
+        # 하루 기록을 활동별 행으로 펼침 (limit은 행 수 기준으로 환산)
+        day_limit = max(1, limit // len(ACTIVITY_CATALOG))
+        records = (await db.execute(select_schedule_deltas(user_id, cursor, day_limit + 1))).all()
+        has_more = len(records) > day_limit
+        records = records[:day_limit]
+        descriptions = {}
+        if records:
+            result = await db.execute(
+                select(DayDescription.date, DayDescription.activity_id, DayDescription.description)
+                .where(user_days_clause(DayDescription.user_id, DayDescription.date, [(user_id, record.date) for record in records]))
+            )
+            descriptions = {(day, activity_id): description for day, activity_id, description in result}
+        items = [
+            {
+                "date": day.isoformat(),
+                "activity_id": activity.id,
+                "description": descriptions.get((day, activity.id), ""),
+                "completed": bool(mask & activity_bit(activity.id)),
+                "updated_at": updated_at.isoformat(),
+                "row_version": row_version,
+            }
+            for _, day, mask, updated_at, row_version in records
+            for activity in ACTIVITY_CATALOG
+        ]
+    else:
+        records = (await db.execute(select_schedule_deltas(user_id, cursor, limit + 1))).all()
+        has_more = len(records) > limit
+        records = records[:limit]
+        items = [
+            {
+                "date": day.isoformat(),
+                "activity_id": activity_id,
+                "description": description or "",
+                "completed": bool(completed),
+                "updated_at": updated_at.isoformat(),
+                "row_version": row_version,
+            }
+            for _, day, activity_id, description, completed, updated_at, row_version in records
+        ]
+    last = (records[-1].updated_at, records[-1].id) if records else cursor
+    return items, last, has_more
+
+# 변경분 동기화: cursor 이후 바뀐 현재 사용자의 일정만 (updated_at, id) 순으로
+@app.get("/schedules/changes")
+async def schedule_changes_since(cursor: str = None, limit: int = 200, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    limit = max(1, min(limit, DELTA_PAGE_LIMIT))
+    position = parse_delta_cursor(cursor) if cursor else None
+    items, last, has_more = await get_schedule_deltas(db, current_user.id, position, limit)
+    return {
+        "schedules": items,
+        "next_cursor": format_delta_cursor(*last) if last else None,
+        "has_more": has_more,
+    }
+
+# 달력 월별 조회 쿼리: 날짜별 저장된 활동 수와 완료 수 (사용자/날짜 인덱스 범위 조회 한 번)
+# compact 모드는 하루 기록의 완료 비트마스크를 읽음
+def select_month_status(user_id: int, first_day: dt_date):
+    if STORAGE_MODE == "compact":
+        return select(DayRecord.date, DayRecord.completed_mask).where(
+            DayRecord.user_id == user_id, DayRecord.date.between(first_day, month_end(first_day))
+        ).order_by(DayRecord.date)
+    return (
+        select(Schedule.date, func.count(), func.count().filter(Schedule.completed == True))
+        .where(Schedule.user_id == user_id, Schedule.date.between(first_day, month_end(first_day)))
+        .group_by(Schedule.date)
+        .order_by(Schedule.date)
+    )
+
+# 월별 날짜 상태: {"YYYY-MM-DD": {"saved": 저장된 활동 수, "completed": 완료 수}}
+async def get_month_status(db: AsyncSession, user_id: int, first_day: dt_date):
+    # 지연 쓰기 모드에서 이 달에 아직 기록되지 않은 저장이 있으면 먼저 기록 (활동별 집계를 DB에서 한 번에 얻기 위해)
+    if WRITE_BEHIND and write_behind.has_pending(user_id, first_day, month_end(first_day)):
+        await write_behind.flush()
+    result = await db.execute(select_month_status(user_id, first_day))
+    if STORAGE_MODE == "compact":
+        days = {
+            day.isoformat(): {
+                "saved": len(ACTIVITY_CATALOG),
+                "completed": sum(bool(mask & activity_bit(activity.id)) for activity in ACTIVITY_CATALOG),
+            }
+            for day, mask in result
+        }
+    else:
+        days = {day.isoformat(): {"saved": saved, "completed": completed} for day, saved, completed in result}
+    return days
+
+# 달력용 월별 저장 현황 (month=YYYY-MM, 없으면 이번 달), 바뀌지 않았으면 304
+@app.get("/schedules/calendar")
+async def schedule_calendar(request: Request, month: str = None, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    try:
+        first_day = dt_date.fromisoformat(f"{month}-01") if month else dt_date.today().replace(day=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month는 YYYY-MM 형식이어야 합니다.")
+    days = await get_month_status(db, current_user.id, first_day)
+    body = json.dumps({"month": first_day.strftime("%Y-%m"), "days": days}, separators=(",", ":")).encode()
+    headers = {
+        "ETag": f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# 연도 비트셋: 활동마다 366일 비트(46바이트)를 활동 카탈로그 순서로 이어 붙인 bytearray
+# 10개 활동이면 사용자/연도당 460바이트, 비트 i는 1월 1일부터 i일째의 완료 여부
+YEAR_BITSET_BYTES = 46
+
+def year_day_index(day: dt_date):
+    return day.toordinal() - dt_date(day.year, 1, 1).toordinal()
+
+def days_in_year(year: int):
+    return dt_date(year, 12, 31).timetuple().tm_yday
+
+# 비트셋에서 한 활동의 완료 비트를 정수로
+def activity_year_bits(bits: bytearray, position: int):
+    offset = position * YEAR_BITSET_BYTES
+    return int.from_bytes(bits[offset:offset + YEAR_BITSET_BYTES], "little")
+
+def set_year_bit(bits: bytearray, position: int, day_index: int, completed: bool):
+    index = position * YEAR_BITSET_BYTES + day_index // 8
+    if completed:
+        bits[index] |= 1 << (day_index % 8)
+    else:
+        bits[index] &= ~(1 << (day_index % 8)) & 0xFF
+
+# 가장 긴 연속 1의 길이 (x & x >> 1을 반복한 횟수)
+def longest_run(bits: int):
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+# end 비트에서 끝나는 연속 1의 길이
+def run_ending_at(bits: int, end: int):
+    if end < 0 or not bits >> end & 1:
+        return 0
+    zeros = ~bits & ((1 << (end + 1)) - 1)
+    return end + 1 if not zeros else end - (zeros.bit_length() - 1)
+
+# 사용자/연도별 완료 비트셋 LRU 캐시 (없으면 DB에서 만들고, 저장 시 해당 비트만 갱신)
+class YearBitsetCache:
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.loading_patches = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.patches = 0
 
-    activities = ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"]
-    counts = {activity: 0 for activity in activities}
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, bits: bytearray):
+        self.entries[key] = (bits, time.time() + self.ttl_seconds)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # 저장된 행의 완료 여부를 캐시된 비트셋에 반영 (만드는 중인 비트셋은 완성 후 반영)
+    def patch(self, rows):
+        for row in rows:
+            key = (row["user_id"], row["date"].year)
+            if key in self.loading_patches:
+                self.loading_patches[key].append(row)
+            entry = self.entries.get(key)
+            if entry is not None:
+                set_year_bit(entry[0], ACTIVITY_POSITION[row["activity_id"]], year_day_index(row["date"]), row["completed"])
+                self.patches += 1
+
+    # 비트셋을 가져오거나 만듦 (같은 키를 동시에 요청하면 한 번만 만듦)
+    async def load(self, user_id: int, year: int):
+        key = (user_id, year)
+        bits = self.get(key)
+        if bits is not None:
+            return bits
+        if key not in self.loading:
+            self.loading[key] = asyncio.ensure_future(self.build(key))
+        return await asyncio.shield(self.loading[key])
+
+    async def build(self, key):
+        self.loading_patches[key] = []
+        try:
+            bits = await read_year_bitset(*key)
+            for row in self.loading_patches[key]:
+                set_year_bit(bits, ACTIVITY_POSITION[row["activity_id"]], year_day_index(row["date"]), row["completed"])
+            self.put(key, bits)
+            return bits
+        finally:
+            del self.loading_patches[key]
+            del self.loading[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "bytes": sum(len(bits) for bits, _ in self.entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "patches": self.patches,
+        }
+
+year_bitsets = YearBitsetCache(YEAR_BITSET_CACHE_SIZE, YEAR_BITSET_CACHE_TTL_SECONDS)
+
+# 연도 완료 기록 조회 쿼리 (완료된 일정만, compact 모드는 하루 기록의 비트마스크)
+def select_year_completions(user_id: int, year: int):
+    start, end = dt_date(year, 1, 1), dt_date(year, 12, 31)
+    if STORAGE_MODE == "compact":
+        return select(DayRecord.date, DayRecord.completed_mask).where(
+            DayRecord.user_id == user_id, DayRecord.date.between(start, end), DayRecord.completed_mask != 0
+        )
+    return select(Schedule.date, Schedule.activity_id).where(
+        Schedule.user_id == user_id, Schedule.date.between(start, end), Schedule.completed == True
+    )
 
-    schedules = db.query(Schedule).filter(
-        Schedule.user_id == current_user.id,
-        Schedule.date >= start,
-        Schedule.date <= end,
-        Schedule.completed == True
-    ).all()
+# DB에서 연도 비트셋 생성 (지연 쓰기 모드는 아직 기록되지 않은 저장을 덮어씀)
+async def read_year_bitset(user_id: int, year: int):
+    bits = bytearray(YEAR_BITSET_BYTES * len(ACTIVITY_CATALOG))
+    # 대기 중인 행은 DB 조회 전에 읽어 둠 (조회 도중 기록이 끝나 flushing이 비어도 빠지지 않음, 이후 저장은 loading_patches로 반영)
+    pending = write_behind.pending_rows(user_id, dt_date(year, 1, 1), dt_date(year, 12, 31)) if WRITE_BEHIND else []
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select_year_completions(user_id, year))
+        if STORAGE_MODE == "compact":
+            for day, mask in result:
+                for activity in ACTIVITY_CATALOG:
+                    if mask & activity_bit(activity.id):
+                        set_year_bit(bits, ACTIVITY_POSITION[activity.id], year_day_index(day), True)
+        else:
+            for day, activity_id in result:
+                set_year_bit(bits, ACTIVITY_POSITION[activity_id], year_day_index(day), True)
+    for row in pending:
+        set_year_bit(bits, ACTIVITY_POSITION[row["activity_id"]], year_day_index(row["date"]), row["completed"])
+    return bits
 
-    for schedule in schedules:
-        activity = schedule.activity.split(": ")[1]  # "1: 운동" 형식에서 "운동" 추출
-        if activity in counts:
-            counts[activity] += 1
+def parse_year(year: int = None):
+    if year is None:
+        return dt_date.today().year
+    if not 1 <= year <= 9999:
+        raise HTTPException(status_code=400, detail="연도가 올바르지 않습니다.")
+    return year
 
-    data = [counts[activity] for activity in activities]
+# 연간 히트맵: 날짜별 완료한 활동 수 (1월 1일부터 순서대로)
+@app.get("/schedules/heatmap")
+async def schedule_heatmap(year: int = None, current_user: CurrentUser = Depends(get_current_user)):
+    year = parse_year(year)
+    bits = await year_bitsets.load(current_user.id, year)
+    counts = [0] * days_in_year(year)
+    for position in range(len(ACTIVITY_CATALOG)):
+        activity_bits = activity_year_bits(bits, position)
+        while activity_bits:
+            lowest = activity_bits & -activity_bits
+            counts[lowest.bit_length() - 1] += 1
+            activity_bits ^= lowest
+    return {"year": year, "start": dt_date(year, 1, 1).isoformat(), "activities": len(ACTIVITY_CATALOG), "counts": counts}
 
-    return {"activities": activities, "data": data}
+# 활동별 연속 완료 기록: 현재 연속 일수(오늘 또는 어제까지, 지난해에서 이어지는 것 포함)와 해당 연도 최장 기록
+@app.get("/schedules/streaks")
+async def schedule_streaks(year: int = None, current_user: CurrentUser = Depends(get_current_user)):
+    year = parse_year(year)
+    today = dt_date.today()
+    bits = await year_bitsets.load(current_user.id, year)
+    as_of = year_day_index(today) if year == today.year else days_in_year(year) - 1
+    streaks = []
+    for position, activity in enumerate(ACTIVITY_CATALOG):
+        activity_bits = activity_year_bits(bits, position)
+        # 오늘 아직 완료하지 않았으면 어제까지의 연속 기록
+        end = as_of if year != today.year or activity_bits >> as_of & 1 else as_of - 1
+        run = current = run_ending_at(activity_bits, end)
+        # 1월 1일까지 이어지면 지난해 말부터 거슬러 올라가며 더함
+        previous_year = year
+        while run == end + 1 and previous_year > 1:
+            previous_year -= 1
+            end = days_in_year(previous_year) - 1
+            run = run_ending_at(activity_year_bits(await year_bitsets.load(current_user.id, previous_year), position), end)
+            current += run
+        streaks.append({
+            "activity_id": activity.id,
+            "title": activity.title,
+            "completed_days": activity_bits.bit_count(),
+            "current": current,
+            "longest": longest_run(activity_bits),
+        })
+    return {"year": year, "as_of": (dt_date(year, 1, 1) + timedelta(days=as_of)).isoformat(), "streaks": streaks}
 
 # 예외 핸들러 추가
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     if exc.status_code == status.HTTP_401_UNAUTHORIZED:
         return templates.TemplateResponse("login.html", {"request": request, "error": "인증되지 않았습니다."})
-    raise exc
+    return await default_http_exception_handler(request, exc)
 
 # 관리자 인증 의존성 추가
-def get_current_admin_user(request: Request, db: Session = Depends(get_db)):
-    user = get_current_user(request, db)
+async def get_current_admin_user(request: Request, db: AsyncSession = Depends(get_db)):
+    user = await get_current_user(request, db)
     if user.username != "k2hcis03":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -449,105 +2220,488 @@ def get_current_admin_user(request: Request, db: Session = Depends(get_db)):
         )
     return user
 
+# 관리자용 내부 상태 조회 (캐시 적중률 등)
+@app.get("/admin/stats")
+async def admin_stats(current_admin: CurrentUser = Depends(get_current_admin_user)):
+    return {
+        "user_cache": user_cache.stats(),
+        "year_bitsets": year_bitsets.stats(),
+        "aggregation_cache": aggregation_cache.stats(),
+        "sqlite": {"profile": SQLITE_PROFILE, "pragmas": SQLITE_PRAGMAS},
+        "writer": db_writer.stats(),
+        "write_behind": write_behind.stats() if WRITE_BEHIND else None,
+    }
+
+# 변경 기록 한 번에 조회할 수 있는 최대 건수
+CHANGES_PAGE_LIMIT = 1000
+
+# 일정 변경 기록 조회 (cursor 이후부터, 응답의 next_cursor로 이어서 조회)
+@app.get("/admin/changes")
+async def read_schedule_changes(since: int = 0, limit: int = 500, db: AsyncSession = Depends(get_db), current_admin: CurrentUser = Depends(get_current_admin_user)):
+    limit = max(1, min(limit, CHANGES_PAGE_LIMIT))
+    result = await db.execute(select_schedule_changes(since, limit + 1))
+    changes = result.scalars().all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return {
+        "changes": [
+            {
+                "seq": change.seq,
+                "op": change.op,
+                "user_id": change.user_id,
+                "date": change.date.isoformat(),
+                "activity_id": change.activity_id,
+                "description": change.description,
+                "completed": change.completed,
+                "changed_at": change.changed_at.isoformat(),
+            }
+            for change in changes
+        ],
+        "next_cursor": changes[-1].seq if changes else since,
+        "has_more": has_more,
+    }
+
+# 사용자별 완료 횟수 CSV 스트리밍 (행렬과 같은 iter_user_counts를 사용자 단위로 바로 씀)
+# 요청 세션은 응답 전에 닫히므로 별도 세션의 읽기 트랜잭션 하나에서 서버 측 커서로 나눠 읽는다
+async def stream_counts_csv(user_ids, start: dt_date, end: dt_date, on_rows=None):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    # 버퍼에 쌓인 행을 인코딩해 내보내고 비움
+    def drain():
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(["사용자", "시작 날짜", "끝 날짜"] + list(ACTIVITY_TITLES))
+    yield "\ufeff".encode("utf-8") + drain()
+
+    written = 0
+    async with AsyncSessionLocal() as db, db.begin():
+        async for _, username, counts in iter_user_counts(db, user_ids, start, end):
+            writer.writerow([username, start.isoformat(), end.isoformat()] + counts)
+            written += 1
+            if written == EXPORT_CHUNK_SIZE:
+                if on_rows is not None:
+                    on_rows(written)
+                written = 0
+                yield drain()
+    if on_rows is not None and written:
+        on_rows(written)
+    yield drain()
+
+# 날짜별 상세 일정 스트리밍: NDJSON 또는 CSV 한 줄씩 (사용자/날짜/활동 순)
+async def stream_detail_rows(user_ids, start: dt_date, end: dt_date, detail_format: str, on_rows=None):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    if detail_format == "csv":
+        writer.writerow(["사용자", "날짜", "활동 번호", "활동", "내용", "완료"])
+        yield "\ufeff".encode("utf-8") + drain()
+
+    async with AsyncSessionLocal() as db, db.begin():
+        stmt = select_detail_rows(user_ids, start, end).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            for username, day, activity_id, description, completed in partition:
+                position = ACTIVITY_POSITION.get(activity_id)
+                title = ACTIVITY_TITLES[position] if position is not None else ""
+                if detail_format == "csv":
+                    writer.writerow([username, day.isoformat(), activity_id, title, description or "", int(bool(completed))])
+                else:
+                    buffer.write(json.dumps({
+                        "username": username,
+                        "date": day.isoformat(),
+                        "activity_id": activity_id,
+                        "activity": title,
+                        "description": description or "",
+                        "completed": bool(completed),
+                    }, ensure_ascii=False))
+                    buffer.write("\n")
+            if on_rows is not None:
+                on_rows(len(partition))
+            yield drain()
+
+# 스트림을 gzip으로 점진 압축 (청크마다 압축된 부분만 내보냄)
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+# 내보내기 형식별 (스트림, 파일 이름, 미디어 타입)
+# counts: 사용자별 집계 CSV, csv/ndjson: gzip 압축된 날짜별 상세
+def build_export(export_format: str, user_ids, start: dt_date, end: dt_date, on_rows=None):
+    period = f"{start.isoformat()}_to_{end.isoformat()}"
+    if export_format == "counts":
+        return stream_counts_csv(user_ids, start, end, on_rows), f"schedules_{period}.csv", "text/csv"
+    chunks = gzip_stream(stream_detail_rows(user_ids, start, end, export_format, on_rows))
+    return chunks, f"schedule_details_{period}.{export_format}.gz", "application/gzip"
+
+# 시작/끝 날짜 문자열 확인 (형식이 틀리거나 시작이 끝보다 늦으면 400)
+def parse_date_range(start_date: str, end_date: str):
+    try:
+        start = dt_date.fromisoformat(start_date)
+        end = dt_date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="날짜 형식이 올바르지 않습니다.")
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="시작 날짜는 끝 날짜보다 빠르거나 같아야 합니다.")
+    return start, end
+
+# 백그라운드 내보내기 작업 상태
+class ExportJob:
+    def __init__(self, export_format: str, user_ids, start: dt_date, end: dt_date):
+        self.id = uuid.uuid4().hex
+        self.export_format = export_format
+        self.user_ids = user_ids
+        self.start = start
+        self.end = end
+        self.status = "queued"
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.error = None
+        self.filename = None
+        self.media_type = None
+        self.path = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def add_rows(self, count: int):
+        self.rows_written += count
+
+    def expired(self, now: float):
+        return self.finished_at is not None and now - self.finished_at > EXPORT_JOB_TTL_SECONDS
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "format": self.export_format,
+            "status": self.status,
+            "rows_written": self.rows_written,
+            "bytes_written": self.bytes_written,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "download_url": f"/admin/exports/{self.id}/download" if self.status == "done" else None,
+        }
+
+export_jobs = {}
+export_slots = None
+export_cleanup_task = None
+export_artifact_dir = None
+sqlite_optimize_task = None
+
+# 내보내기 작업 실행 (동시 실행 수 제한, 결과는 임시 디렉터리의 파일로 저장)
+async def run_export_job(job: ExportJob):
+    async with export_slots:
+        job.status = "running"
+        chunks, job.filename, job.media_type = build_export(job.export_format, job.user_ids, job.start, job.end, job.add_rows)
+        path = os.path.join(export_artifact_dir, f"{job.id}.part")
+        try:
+            # 파일 쓰기는 이벤트 루프를 막지 않도록 스레드에서
+            artifact = await asyncio.to_thread(open, path, "wb")
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(artifact.write, chunk)
+                    job.bytes_written += len(chunk)
+            finally:
+                await asyncio.to_thread(artifact.close)
+            job.path = os.path.join(export_artifact_dir, job.id)
+            os.replace(path, job.path)
+            job.status = "done"
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            if os.path.exists(path):
+                os.remove(path)
+        finally:
+            job.finished_at = time.time()
+
+# 보관 시간이 지난 작업과 결과 파일 삭제
+def cleanup_expired_exports():
+    now = time.time()
+    for job_id, job in list(export_jobs.items()):
+        if job.expired(now):
+            if job.path and os.path.exists(job.path):
+                os.remove(job.path)
+            del export_jobs[job_id]
+
+# 주기적으로 만료된 내보내기 정리
+async def export_cleanup_loop():
+    while True:
+        await asyncio.sleep(EXPORT_CLEANUP_INTERVAL_SECONDS)
+        cleanup_expired_exports()
+
+# 내보내기 작업 등록 (작업 id를 바로 돌려주고 응답 후 백그라운드에서 생성)
+@app.post("/admin/exports", status_code=status.HTTP_202_ACCEPTED)
+async def create_export(request: Request, background_tasks: BackgroundTasks, current_admin: CurrentUser = Depends(get_current_admin_user)):
+    form = await request.form()
+    start_date = form.get("start_date")
+    end_date = form.get("end_date")
+    selected_user_ids = parse_user_selection(form)
+    export_format = form.get("export_format", "counts")
+
+    if not start_date or not end_date or not selected_user_ids or export_format not in ("counts", "csv", "ndjson"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="모든 필드를 올바르게 입력해야 합니다.")
+    start, end = parse_date_range(start_date, end_date)
+
+    cleanup_expired_exports()
+    job = ExportJob(export_format, selected_user_ids, start, end)
+    export_jobs[job.id] = job
+    background_tasks.add_task(run_export_job, job)
+    return {**job.to_dict(), "status_url": f"/admin/exports/{job.id}"}
+
+# 내보내기 작업 조회 (만료되었거나 없는 작업은 404)
+def get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None or job.expired(time.time()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="내보내기 작업을 찾을 수 없습니다.")
+    return job
+
+# 내보내기 진행 상태 조회
+@app.get("/admin/exports/{job_id}")
+async def export_status(job_id: str, current_admin: CurrentUser = Depends(get_current_admin_user)):
+    return get_export_job(job_id).to_dict()
+
+# 완료된 내보내기 파일 다운로드
+@app.get("/admin/exports/{job_id}/download")
+async def export_download(job_id: str, current_admin: CurrentUser = Depends(get_current_admin_user)):
+    job = get_export_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="내보내기가 아직 완료되지 않았습니다.")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+# 통계 정보 갱신 (SQLite가 필요하다고 판단한 테이블만 분석)
+async def optimize_database():
+    async with async_engine.connect() as conn:
+        await conn.exec_driver_sql("PRAGMA optimize")
+
+# 주기적으로 PRAGMA optimize 실행
+async def sqlite_optimize_loop():
+    while True:
+        await asyncio.sleep(SQLITE_OPTIMIZE_INTERVAL_SECONDS)
+        await optimize_database()
+
+# CSV 가져오기 설정 (한 번에 읽어 저장하는 행 수)
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "5000"))
+# 가져오기 CSV 헤더 (상세 CSV 내보내기 형식 또는 영문 이름)
+IMPORT_COLUMNS = {
+    "사용자": "username", "username": "username",
+    "날짜": "date", "date": "date",
+    "활동 번호": "activity_id", "activity_id": "activity_id",
+    "활동": "activity", "activity": "activity",
+    "내용": "description", "description": "description",
+    "완료": "completed", "completed": "completed",
+}
+IMPORT_TRUE_VALUES = {"1", "true", "y", "yes", "o"}
+IMPORT_FALSE_VALUES = {"0", "false", "n", "no", "x", ""}
+
+# CSV에서 최대 size개의 (줄 번호, 필드 목록) 읽기 (빈 줄은 건너뜀, 스레드에서 실행)
+def read_import_chunk(reader, size: int):
+    chunk = []
+    for fields in reader:
+        if not any(fields):
+            continue
+        chunk.append((reader.line_num, fields))
+        if len(chunk) >= size:
+            break
+    return chunk
+
+# CSV 한 줄을 (사용자 이름, 일정 행)으로 변환: (username, row, 오류 메시지)
+def parse_import_row(fields, columns, activity_ids_by_title):
+    values = {name: fields[index].strip() if index < len(fields) else "" for name, index in columns.items()}
+    if not values["username"]:
+        return None, None, "사용자 이름이 없습니다."
+    try:
+        schedule_date = dt_date.fromisoformat(values["date"])
+    except ValueError:
+        return None, None, "날짜 형식이 올바르지 않습니다."
+    if values.get("activity_id"):
+        activity_id = int(values["activity_id"]) if values["activity_id"].isdigit() else None
+    else:
+        activity_id = activity_ids_by_title.get(values.get("activity", ""))
+    if activity_id not in ACTIVITY_POSITION:
+        return None, None, "알 수 없는 활동입니다."
+    completed = values["completed"].lower()
+    if completed not in IMPORT_TRUE_VALUES and completed not in IMPORT_FALSE_VALUES:
+        return None, None, "완료 여부 값이 올바르지 않습니다."
+    return values["username"], {
+        "activity_id": activity_id,
+        "description": values.get("description", ""),
+        "date": schedule_date,
+        "completed": completed in IMPORT_TRUE_VALUES,
+    }, None
+
+# 사용자 이름 -> id 조회 (이미 찾은 이름은 캐시 사용, 없는 사용자는 None으로 기억)
+async def resolve_usernames(user_ids, usernames):
+    missing = [username for username in usernames if username not in user_ids]
+    if not missing:
+        return
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.username, User.id).where(User.username.in_(missing)))
+        found = dict(result.all())
+    for username in missing:
+        user_ids[username] = found.get(username)
+
+# CSV 가져오기: 청크 단위로 읽어 검증 후 저장, 청크마다 진행 상황 NDJSON 한 줄
+async def import_schedules_csv(upload: UploadFile):
+    # 버퍼에 남은 저장이 가져온 값을 나중에 덮어쓰지 않도록 먼저 기록
+    if WRITE_BEHIND:
+        await write_behind.flush()
+    reader = csv.reader(TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+    try:
+        header = await asyncio.to_thread(next, reader, [])
+    except (UnicodeDecodeError, csv.Error) as exc:
+        yield json.dumps({"error": f"CSV를 읽을 수 없습니다: {exc}"}, ensure_ascii=False) + "\n"
+        return
+    columns = {}
+    for index, name in enumerate(header):
+        if name.strip() in IMPORT_COLUMNS:
+            columns.setdefault(IMPORT_COLUMNS[name.strip()], index)
+    if not {"username", "date", "completed"} <= columns.keys() or not columns.keys() & {"activity_id", "activity"}:
+        yield json.dumps({"error": "필수 열(사용자, 날짜, 활동 또는 활동 번호, 완료)이 없습니다."}, ensure_ascii=False) + "\n"
+        return
+
+    activity_ids_by_title = {activity.title: activity.id for activity in ACTIVITY_CATALOG}
+    user_ids = {}
+    totals = {"rows": 0, "saved": 0, "changed": 0, "rejected": 0}
+    started = time.monotonic()
+    chunk_number = 0
+    while True:
+        try:
+            chunk = await asyncio.to_thread(read_import_chunk, reader, IMPORT_CHUNK_SIZE)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            yield json.dumps({"error": f"CSV를 읽을 수 없습니다: {exc}", **totals}, ensure_ascii=False) + "\n"
+            return
+        if not chunk:
+            break
+        chunk_number += 1
+        chunk_started = time.monotonic()
+        parsed = []
+        rejected = []
+        for line, fields in chunk:
+            username, row, error = parse_import_row(fields, columns, activity_ids_by_title)
+            if error:
+                rejected.append({"line": line, "error": error, "row": fields})
+            else:
+                parsed.append((line, fields, username, row))
+        try:
+            await resolve_usernames(user_ids, {username for _, _, username, _ in parsed})
+            # 같은 사용자/날짜/활동이 여러 번 나오면 마지막 줄 사용
+            rows = {}
+            for line, fields, username, row in parsed:
+                user_id = user_ids[username]
+                if user_id is None:
+                    rejected.append({"line": line, "error": "존재하지 않는 사용자입니다.", "row": fields})
+                    continue
+                row["user_id"] = user_id
+                rows[(user_id, row["date"], row["activity_id"])] = row
+            changes = await db_writer.submit(save_schedule_rows, list(rows.values())) if rows else []
+        except Exception as exc:
+            # 이 묶음은 저장되지 않음 (앞선 묶음은 이미 커밋됨), 오류 줄을 남기고 중단
+            logger.exception("schedule import failed at chunk %d", chunk_number)
+            yield json.dumps({"error": f"{chunk_number}번째 묶음을 저장하지 못했습니다: {exc}", "chunk": chunk_number, **totals}, ensure_ascii=False) + "\n"
+            return
+        year_bitsets.patch(rows.values())
+        totals["rows"] += len(chunk)
+        totals["saved"] += len(rows)
+        totals["changed"] += len(changes)
+        totals["rejected"] += len(rejected)
+        yield json.dumps({
+            "chunk": chunk_number,
+            "rows": len(chunk),
+            "saved": len(rows),
+            "changed": len(changes),
+            "rejected": len(rejected),
+            "rejected_rows": sorted(rejected, key=lambda item: item["line"]),
+            "elapsed_ms": round((time.monotonic() - chunk_started) * 1000, 1),
+        }, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, **totals, "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}) + "\n"
+
+# 관리자 일정 가져오기 (multipart의 file 필드로 CSV 업로드, 진행 상황을 NDJSON으로 스트리밍)
+# File 파라미터는 라우트가 반환될 때 닫히므로 폼을 직접 읽고 응답이 끝난 뒤 닫음
+@app.post("/admin/import")
+async def admin_import(request: Request, current_admin: CurrentUser = Depends(get_current_admin_user)):
+    form = await request.form()
+    upload = form.get("file")
+    if not isinstance(upload, UploadFile):
+        await form.close()
+        raise HTTPException(status_code=400, detail="CSV 파일을 선택해야 합니다.")
+    return StreamingResponse(
+        import_schedules_csv(upload),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(form.close),
+    )
+
+# 관리자용 사용자 검색 (대시보드 사용자 선택 자동완성)
+@app.get("/admin/users")
+async def search_users(q: str = "", after: str = None, limit: int = 20, db: AsyncSession = Depends(get_db), current_admin: CurrentUser = Depends(get_current_admin_user)):
+    limit = max(1, min(limit, USER_SEARCH_LIMIT))
+    rows = (await db.execute(select_users_by_prefix(q, after, limit + 1))).all()
+    users = [{"id": user_id, "username": username} for user_id, username in rows[:limit]]
+    return {"users": users, "next_after": users[-1]["username"] if len(rows) > limit else None}
+
 # 관리자 대시보드 라우트 - GET 요청 추가
 @app.get("/admin_dashboard", response_class=HTMLResponse)
-async def admin_dashboard_get(request: Request, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+async def admin_dashboard_get(request: Request, current_admin: CurrentUser = Depends(get_current_admin_user)):
     return templates.TemplateResponse(
         "admin_dashboard.html",
         {
             "request": request,
-            "users": db.query(User).all(),
             "selected_start_date": None,
             "selected_end_date": None,
             "selected_users": [],
-            "activities": ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"],
+            "all_users": False,
+            "activities": ACTIVITY_TITLES,
             "data": []
         }
     )
 
 # 관리자 대시보드 라우트 - POST 요청
 @app.post("/admin_dashboard")
-async def admin_dashboard_post(request: Request, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+async def admin_dashboard_post(request: Request, db: AsyncSession = Depends(get_db), current_admin: CurrentUser = Depends(get_current_admin_user)):
     form = await request.form()
     start_date = form.get("start_date")
     end_date = form.get("end_date")
-    selected_user_ids = form.getlist("user_ids")
+    selected_user_ids = parse_user_selection(form)
     download_csv = form.get("download_csv")  # CSV 다운로드 버튼 클릭 여부 확인
+    detail_format = form.get("detail_format")  # 상세 내보내기 형식 (ndjson 또는 csv)
     
     if not start_date or not end_date or not selected_user_ids:
         return templates.TemplateResponse("error.html", {"request": request, "error": "모든 필드를 입력해야 합니다."})
     
-    start = dt_date.fromisoformat(start_date)
-    end = dt_date.fromisoformat(end_date)
+    start, end = parse_date_range(start_date, end_date)
     
-    schedules = db.query(Schedule).filter(
-        Schedule.user_id.in_(selected_user_ids),
-        Schedule.date >= start,
-        Schedule.date <= end,
-        Schedule.completed == True
-    ).all()
-    print(f"hello1,{download_csv}")
+    if detail_format in ("csv", "ndjson") or download_csv:
+        # CSV/NDJSON 다운로드 요청 처리 (집계 전에 바로 스트리밍 시작, 상세 내보내기는 gzip 파일)
+        chunks, filename, media_type = build_export(detail_format or "counts", selected_user_ids, start, end)
+        return StreamingResponse(chunks, media_type=media_type, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+
     # 활동별 완료 횟수 집계
-    activities = ["운동", "책읽기", "음원듣기", "미팅 참석", "제품이용", "사업설명", "소비자 관리", "상담", "신뢰 쌓기", "e-com"]
-    counts = {activity: 0 for activity in activities}
-    
-    for schedule in schedules:
-        activity = schedule.activity.split(": ")[1]  # "1: 운동" 형식에서 "운동" 추출
-        if activity in counts:
-            counts[activity] += 1
-    
-    data = [counts[activity] for activity in activities]
-    
-    if download_csv:
-        print(f"hello2,{download_csv}")
-        # CSV 다운로드 요청 처리
-        user_schedule_counts = {}
-        for user_id in selected_user_ids:
-            user_schedule_counts[user_id] = {activity: 0 for activity in activities}
-        
-        for schedule in schedules:
-            user_id = str(schedule.user_id)
-            activity = schedule.activity.split(": ")[1]
-            if activity in activities:
-                user_schedule_counts[user_id][activity] += 1
-        
-        # 사용자 목록 조회
-        users = db.query(User).filter(User.id.in_(selected_user_ids)).all()
-        user_dict = {str(user.id): user.username for user in users}
-        
-        # CSV 생성
-        def generate_csv():
-            from io import BytesIO, TextIOWrapper
-            buffer = BytesIO()
-            wrapper = TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
-            writer = csv.writer(wrapper)
-            header = ["사용자", "시작 날짜", "끝 날짜"] + activities
-            writer.writerow(header)
-            for user_id, activity_counts in user_schedule_counts.items():
-                row = [
-                    user_dict.get(user_id, "Unknown"),
-                    start_date,
-                    end_date
-                ] + [activity_counts[activity] for activity in activities]
-                writer.writerow(row)
-            wrapper.flush()
-            buffer.seek(0)
-            yield buffer.read()
-        
-        headers = {
-            'Content-Disposition': f'attachment; filename="schedules_{start_date}_to_{end_date}.csv"'
-        }
-        return StreamingResponse(generate_csv(), media_type="text/csv", headers=headers)
+    activities = ACTIVITY_TITLES
+    data = (await get_activity_matrix(db, selected_user_ids, start, end)).activity_totals()
     
     # 그래프 생성 요청 처리
     return templates.TemplateResponse(
         "admin_dashboard.html",
         {
             "request": request,
-            "users": db.query(User).all(),
             "selected_start_date": start_date,
             "selected_end_date": end_date,
-            "selected_users": selected_user_ids,
+            "selected_users": [] if selected_user_ids == ALL_USERS else await get_users_by_ids(db, selected_user_ids),
+            "all_users": selected_user_ids == ALL_USERS,
             "activities": activities,
             "data": data
         }
@@ -555,16 +2709,49 @@ async def admin_dashboard_post(request: Request, db: Session = Depends(get_db),
 
 # 앱 시작 시 관리자 계정 생성
 @app.on_event("startup")
-def startup_event():
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    admin_user = db.query(User).filter(User.username == "k2hcis03").first()
-    if not admin_user:
-        hashed_password = get_password_hash("freedom")
-        admin_user = User(username="k2hcis03", hashed_password=hashed_password)
-        db.add(admin_user)
-        db.commit()
-    db.close()
+async def startup_event():
+    global hash_executor, hash_slots, export_slots, export_cleanup_task, export_artifact_dir, sqlite_optimize_task
+    if HASH_POOL_SIZE > 0:
+        hash_executor = ProcessPoolExecutor(max_workers=HASH_POOL_SIZE)
+    hash_slots = asyncio.Semaphore(HASH_QUEUE_SIZE)
+    # 작업 정보는 프로세스 메모리에만 있으므로 결과 파일도 프로세스별 디렉터리에 둠
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    export_artifact_dir = tempfile.mkdtemp(prefix="exports-", dir=EXPORT_DIR)
+    export_slots = asyncio.Semaphore(EXPORT_JOB_CONCURRENCY)
+    export_cleanup_task = asyncio.create_task(export_cleanup_loop())
+    if engine.dialect.name == "sqlite" and SQLITE_OPTIMIZE_INTERVAL_SECONDS > 0:
+        sqlite_optimize_task = asyncio.create_task(sqlite_optimize_loop())
+    async with async_engine.begin() as conn:
+        await conn.run_sync(init_db)
+        await conn.run_sync(load_activity_catalog)
+    db_writer.start()
+    if WRITE_BEHIND:
+        await write_behind.start()
+    async with AsyncSessionLocal() as db:
+        admin_user = await get_user_by_username(db, "k2hcis03")
+        if not admin_user:
+            hashed_password = await get_password_hash_async("freedom")
+            admin_user = User(username="k2hcis03", hashed_password=hashed_password)
+            db.add(admin_user)
+            await db.commit()
+
+# 앱 종료 시 쓰기 스레드, 해싱 프로세스, 내보내기 파일 정리 및 통계 갱신
+@app.on_event("shutdown")
+async def shutdown_event():
+    if export_cleanup_task is not None:
+        export_cleanup_task.cancel()
+    if export_artifact_dir is not None:
+        shutil.rmtree(export_artifact_dir, ignore_errors=True)
+    if sqlite_optimize_task is not None:
+        sqlite_optimize_task.cancel()
+    if WRITE_BEHIND:
+        await write_behind.stop()
+    await db_writer.stop()
+    if engine.dialect.name == "sqlite":
+        await optimize_database()
+    if hash_executor is not None:
+        hash_executor.shutdown(cancel_futures=True)
+    await async_engine.dispose()
 
 # 다른 라우트 및 로직
 
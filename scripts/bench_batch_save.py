@@ -0,0 +1,100 @@
+"""여러 날 일정 저장 처리량 벤치마크
+
+1일, 7일, 31일 분량을 저장할 때 날짜마다 /add_schedule 폼을 보내는 방식(before)과
+/schedules/batch 한 번으로 보내는 방식(after)의 소요 시간과 초당 저장 일수를 비교한다.
+
+사용법 (저장소 루트에서 실행, httpx 필요):
+    python scripts/bench_batch_save.py [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def day_form(day, round_number):
+    form = {"schedule_date": day.isoformat()}
+    for i in range(1, 11):
+        form[f"description{i}"] = f"round {round_number} activity {i}"
+        if (i + round_number) % 2:
+            form[f"completed{i}"] = "on"
+    return form
+
+
+def day_json(day, round_number):
+    return {
+        "date": day.isoformat(),
+        "activities": [
+            {
+                "activity_id": i,
+                "description": f"round {round_number} activity {i}",
+                "completed": bool((i + round_number) % 2),
+            }
+            for i in range(1, 11)
+        ],
+    }
+
+
+async def run(rounds):
+    import httpx
+    import main
+
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/register", data={"username": "bench", "password": "bench-password"})
+            response = await client.post("/token", data={"username": "bench", "password": "bench-password"})
+            client.cookies.set("access_token", response.cookies["access_token"])
+
+            for days in (1, 7, 31):
+                before = after = 0.0
+                for round_number in range(rounds):
+                    # 매 회차 내용을 바꿔 실제 갱신이 일어나게 함
+                    start_day = date(2025, 1, 1) + timedelta(days=64 * round_number)
+                    dates = [start_day + timedelta(days=offset) for offset in range(days)]
+                    started = time.perf_counter()
+                    for day in dates:
+                        await client.post("/add_schedule", data=day_form(day, round_number))
+                    before += time.perf_counter() - started
+
+                    dates = [day + timedelta(days=32) for day in dates]
+                    started = time.perf_counter()
+                    response = await client.post("/schedules/batch", json={"days": [day_json(day, round_number) for day in dates]})
+                    after += time.perf_counter() - started
+                    assert response.json()["saved"] == days, response.text
+                results.append((days, before / rounds, after / rounds))
+    finally:
+        await main.app.router.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("HASH_POOL_SIZE", "0")
+        results = asyncio.run(run(args.rounds))
+
+    print(f"{'일수':<6}{'before (폼 x N)':>18}{'after (batch)':>16}{'before days/s':>16}{'after days/s':>15}")
+    for days, before, after in results:
+        print(
+            f"{days:<6}"
+            f"{before * 1000:>16.1f}ms{after * 1000:>14.1f}ms"
+            f"{days / before:>16.1f}{days / after:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""CSV 일정 가져오기 처리량/메모리 벤치마크
+
+사용자 N명 x 날짜 D일 x 10개 활동 분량의 CSV를 만들어 /admin/import로 올리고
+전체 소요 시간, 초당 행 수, 프로세스 최대 메모리(RSS)를 출력한다.
+
+사용법 (저장소 루트에서 실행, httpx 필요):
+    python scripts/bench_import.py [--users 100] [--days 1000]   # 100 x 1000 x 10 = 100만 행
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_csv(path, users, days):
+    with open(path, "w", encoding="utf-8-sig", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(["사용자", "날짜", "활동 번호", "내용", "완료"])
+        for user in range(users):
+            for offset in range(days):
+                day = (date(2020, 1, 1) + timedelta(days=offset)).isoformat()
+                for activity_id in range(1, 11):
+                    writer.writerow([f"import{user}", day, activity_id, f"note {offset}", (user + offset + activity_id) % 3 == 0])
+
+
+async def run(path, users):
+    import httpx
+    import main
+
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        with main.engine.begin() as conn:
+            conn.execute(main.User.__table__.insert(), [
+                {"username": f"import{user}", "hashed_password": "x"} for user in range(users)
+            ])
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            response = await client.post("/token", data={"username": "k2hcis03", "password": "freedom"})
+            client.cookies.set("access_token", response.cookies["access_token"])
+            started = time.perf_counter()
+            with open(path, "rb") as upload:
+                async with client.stream("POST", "/admin/import", files={"file": ("import.csv", upload, "text/csv")}) as response:
+                    async for line in response.aiter_lines():
+                        if line:
+                            last = json.loads(line)
+            elapsed = time.perf_counter() - started
+    finally:
+        await main.app.router.shutdown()
+    return last, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--days", type=int, default=1000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "import.csv")
+        write_csv(path, args.users, args.days)
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("HASH_POOL_SIZE", "0")
+        print(f"CSV {args.users * args.days * 10:,}행, {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+        summary, elapsed = asyncio.run(run(path, args.users))
+
+    print(json.dumps(summary, ensure_ascii=False))
+    print(f"소요 {elapsed:.1f}s, {summary.get('rows', 0) / elapsed:,.0f} rows/s")
+    print(f"최대 RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
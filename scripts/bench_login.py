@@ -0,0 +1,107 @@
+"""로그인 폭주 시 지연 시간 벤치마크
+
+동시 로그인 50건을 보내는 동안 관련 없는 라우트(정적 이미지)의 응답 시간을 함께 측정한다.
+해싱을 이벤트 루프에서 직접 하는 경우(HASH_POOL_SIZE=0)와 해싱 프로세스 풀을 쓰는 경우를 비교한다.
+
+사용법 (저장소 루트에서 실행, httpx 필요):
+    python scripts/bench_login.py [--logins 50] [--pool-size 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_once(logins):
+    import httpx
+    import main
+
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/register", data={"username": "bench", "password": "bench-password"})
+
+            login_times = []
+            other_times = []
+            done = asyncio.Event()
+
+            async def login():
+                started = time.perf_counter()
+                await client.post("/token", data={"username": "bench", "password": "bench-password"})
+                login_times.append(time.perf_counter() - started)
+
+            async def unrelated():
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await client.get("/static/images/default.jpg")
+                    other_times.append(time.perf_counter() - started)
+                    await asyncio.sleep(0.01)
+
+            watcher = asyncio.create_task(unrelated())
+            await asyncio.gather(*(login() for _ in range(logins)))
+            done.set()
+            await watcher
+    finally:
+        await main.app.router.shutdown()
+
+    return {
+        "login_p50": percentile(login_times, 50),
+        "login_p99": percentile(login_times, 99),
+        "other_p50": percentile(other_times, 50),
+        "other_p99": percentile(other_times, 99),
+        "other_max": max(other_times),
+    }
+
+
+def run_child(pool_size, logins):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env["HASH_POOL_SIZE"] = str(pool_size)
+        output = subprocess.check_output(
+            [sys.executable, __file__, "--child", "--logins", str(logins)],
+            cwd=ROOT,
+            env=env,
+        )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--child", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(asyncio.run(run_once(args.logins))))
+        return
+
+    print(f"동시 로그인 {args.logins}건")
+    print(f"{'모드':<16}{'login p50':>12}{'login p99':>12}{'other p50':>12}{'other p99':>12}{'other max':>12}")
+    for label, pool_size in (("before (inline)", 0), (f"after (pool={args.pool_size})", args.pool_size)):
+        result = run_child(pool_size, args.logins)
+        print(
+            f"{label:<16}"
+            f"{result['login_p50'] * 1000:>10.0f}ms{result['login_p99'] * 1000:>10.0f}ms"
+            f"{result['other_p50'] * 1000:>10.0f}ms{result['other_p99'] * 1000:>10.0f}ms"
+            f"{result['other_max'] * 1000:>10.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""SQLite 연결 프로필별 동시 읽기/쓰기 처리량 벤치마크
+
+워커 프로세스 여러 개(여러 uvicorn 워커를 흉내)가 같은 DB 파일에 일정 저장과
+기간 집계 조회를 동시에 실행하고, 프로필(SQLITE_PROFILE)마다 초당 처리량과
+"database is locked" 오류 수를 비교한다.
+
+사용법 (저장소 루트에서 실행):
+    python scripts/bench_sqlite_profiles.py [--workers 4] [--seconds 5] [--profiles default,wal,performance]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS = 20
+
+
+# DB 생성 및 사용자 등록
+def setup():
+    import main
+
+    with main.engine.begin() as conn:
+        main.init_db(conn)
+        conn.execute(main.User.__table__.insert(), [
+            {"username": f"bench{i}", "hashed_password": "x"} for i in range(USERS)
+        ])
+    main.engine.dispose()
+
+
+# 한 워커 프로세스: 저장 스레드와 조회 스레드를 정해진 시간 동안 실행
+def work(seconds, writers, readers):
+    from sqlalchemy.exc import OperationalError
+    import main
+
+    with main.engine.connect() as conn:
+        main.load_activity_catalog(conn)
+        user_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM users")]
+    counters = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def count(key):
+        with lock:
+            counters[key] += 1
+
+    def writer():
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            user_id = rng.choice(user_ids)
+            day = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+            rows = [
+                {
+                    "user_id": user_id,
+                    "activity_id": activity.id,
+                    "description": "",
+                    "date": day,
+                    "completed": rng.random() < 0.5,
+                }
+                for activity in main.ACTIVITY_CATALOG
+            ]
+            try:
+                with main.engine.begin() as conn:
+                    main.save_schedule_rows(conn, rows)
+                count("writes")
+            except OperationalError:
+                count("errors")
+
+    def reader():
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            user_id = rng.choice(user_ids)
+            try:
+                with main.engine.connect() as conn:
+                    conn.execute(main.select_activity_counts([user_id], date(2025, 1, 15), date(2025, 11, 20))).all()
+                    conn.execute(main.select_day_schedules(user_id, date(2025, 3, 1))).all()
+                count("reads")
+            except OperationalError:
+                count("errors")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    main.engine.dispose()
+    return counters
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env["SQLITE_PROFILE"] = profile
+        subprocess.check_call([sys.executable, __file__, "--setup"], cwd=ROOT, env=env)
+        command = [
+            sys.executable, __file__, "--worker",
+            "--seconds", str(args.seconds),
+            "--writers", str(args.writers),
+            "--readers", str(args.readers),
+        ]
+        workers = [
+            subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.PIPE)
+            for _ in range(args.workers)
+        ]
+        totals = {"writes": 0, "reads": 0, "errors": 0}
+        for worker in workers:
+            output, _ = worker.communicate()
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            for key in totals:
+                totals[key] += result[key]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profiles", default="default,wal,performance")
+    parser.add_argument("--setup", action="store_true")
+    parser.add_argument("--worker", action="store_true")
+    args = parser.parse_args()
+
+    if args.setup or args.worker:
+        sys.path.insert(0, ROOT)
+        if args.setup:
+            setup()
+        else:
+            print(json.dumps(work(args.seconds, args.writers, args.readers)))
+        return
+
+    print(f"워커 {args.workers}개 x (저장 {args.writers} + 조회 {args.readers}) 스레드, {args.seconds:g}초")
+    print(f"{'프로필':<14}{'writes/s':>12}{'reads/s':>12}{'locked':>10}")
+    for profile in args.profiles.split(","):
+        totals = run_profile(profile, args)
+        print(
+            f"{profile:<14}"
+            f"{totals['writes'] / args.seconds:>12.1f}"
+            f"{totals['reads'] / args.seconds:>12.1f}"
+            f"{totals['errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""사용자가 많은 일괄 저장 점검
+
+사용자 1,200명의 일정을 한 번의 save_schedule_rows로 저장(새로 저장, 다시 수정, 사용자마다
+2년에 걸친 달별 하루씩 저장)하고,
+저장 중 오류가 없는지와 갱신된 일별/월별 집계가 전체 재계산 결과와 같은지 확인한다.
+(사용자 수만큼 늘어나는 조건이 SQLite 식 깊이 제한을 넘지 않는지 확인하는 용도)
+두 저장 방식(rows, compact)을 각각 새 DB에서 점검하고, 하나라도 실패하면 종료 코드 1.
+
+사용법 (저장소 루트에서 실행):
+    python scripts/check_large_saves.py [--users 1200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rollup_rows(main, conn):
+    daily = conn.execute(main.select(main.DailyRollup.__table__).order_by(*main.DailyRollup.__table__.primary_key)).all()
+    monthly = conn.execute(main.select(main.MonthlyRollup.__table__).order_by(*main.MonthlyRollup.__table__.primary_key)).all()
+    return daily, monthly
+
+
+# 한 저장 방식 점검 (환경 변수로 STORAGE_MODE와 DB를 정한 자식 프로세스에서 실행)
+def check(users):
+    import main
+
+    with main.engine.begin() as conn:
+        main.init_db(conn)
+        conn.execute(main.User.__table__.insert(), [
+            {"username": f"large{i}", "hashed_password": "x"} for i in range(users)
+        ])
+        main.load_activity_catalog(conn)
+        user_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM users WHERE username LIKE 'large%'")]
+
+    def rows(round_number):
+        return [
+            {
+                "user_id": user_id,
+                "activity_id": activity.id,
+                "description": f"round {round_number}" if activity.id % 3 == 0 else "",
+                "date": date(2025, 1, 1) + timedelta(days=index % 60),
+                "completed": (user_id + activity.id + round_number) % 2 == 0,
+            }
+            for index, user_id in enumerate(user_ids)
+            for activity in main.ACTIVITY_CATALOG
+        ]
+
+    # 가져오기처럼 사용자마다 여러 달에 흩어진 날짜 (월별 집계 조건이 사용자 x 달로 늘어나지 않는지)
+    def sparse_rows():
+        return [
+            {"user_id": user_id, "activity_id": 1, "description": "", "date": date(2023 + month // 12, month % 12 + 1, 15), "completed": True}
+            for user_id in user_ids
+            for month in range(24)
+        ]
+
+    for round_number, round_rows in enumerate((rows(0), rows(1), sparse_rows())):
+        with main.engine.begin() as conn:
+            changes = main.save_schedule_rows(conn, round_rows)
+        print(f"  round {round_number}: {len(changes)} changes")
+
+    with main.engine.begin() as conn:
+        refreshed = rollup_rows(main, conn)
+        main.rebuild_rollups(conn)
+        rebuilt = rollup_rows(main, conn)
+    main.engine.dispose()
+    return refreshed == rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1200)
+    parser.add_argument("--child", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        sys.exit(0 if check(args.users) else 1)
+
+    failed = False
+    for mode in ("rows", "compact"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'large.db')}"
+            env["STORAGE_MODE"] = mode
+            print(f"[{mode}] 사용자 {args.users}명")
+            code = subprocess.call([sys.executable, __file__, "--child", "--users", str(args.users)], cwd=ROOT, env=env)
+        print(f"[{'FAIL' if code else ' OK '}] {mode}")
+        failed = failed or bool(code)
+
+    if failed:
+        print("대량 저장 점검에 실패했습니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
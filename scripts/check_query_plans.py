@@ -0,0 +1,170 @@
+"""주요 조회 쿼리의 실행 계획 점검
+
+앱이 실제로 사용하는 쿼리 빌더로 SQL을 만들고 EXPLAIN QUERY PLAN 결과에
+테이블 전체 스캔(SCAN)이 있으면 실패(종료 코드 1)한다.
+일정 저장은 save_schedule_rows가 실제로 실행하는 문장을 그대로 모아 점검하고,
+두 저장 방식(rows, compact)을 각각 새 DB에서 점검한다.
+
+사용법 (저장소 루트에서 실행):
+    python scripts/check_query_plans.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
+
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# 점검할 쿼리 목록: (이름, SQLAlchemy 문장)
+def build_queries(main):
+    day = date(2025, 1, 9)
+    return [
+        ("get_current_user", main.select(main.User).where(main.User.username == "user2")),
+        ("admin_user_search", main.select_users_by_prefix("user1", "user12", 21)),
+        ("get_add_schedule", main.select_day_schedules(2, day)),
+        ("get_add_schedule (compact)", main.select_day_record(2, day)),
+        ("get_add_schedule (compact descriptions)", main.select_day_descriptions(2, day)),
+        ("admin_changes", main.select_schedule_changes(100, 500)),
+        ("schedule_changes_since", main.select_schedule_deltas(2, (main.datetime(2025, 1, 1), 10), 200)),
+        ("schedule_calendar", main.select_month_status(2, date(2025, 1, 1))),
+        ("schedule_year_bitset", main.select_year_completions(2, 2025)),
+        ("search_schedules", main.select_activity_counts([2], date(2025, 1, 15), date(2025, 11, 20))),
+        ("admin_dashboard_post", main.select_activity_counts([2, 3, 4], date(2025, 1, 1), date(2025, 12, 31))),
+        ("admin_dashboard_post (csv)", main.select_user_count_rows([2, 3, 4], date(2025, 1, 1), date(2025, 12, 31))),
+        ("admin_dashboard_post (detail)", main.select_detail_rows([2, 3, 4], date(2025, 1, 1), date(2025, 12, 31))),
+        ("admin_dashboard_post (all users)", main.select_user_count_rows(main.ALL_USERS, date(2025, 1, 1), date(2025, 12, 31))),
+        ("admin_dashboard_post (all users detail)", main.select_detail_rows(main.ALL_USERS, date(2025, 1, 1), date(2025, 12, 31))),
+    ]
+
+
+# 일정 저장에 넘길 행: 기존 날짜 수정(내용 입력/지우기 포함)과 새 날짜 추가를 여러 사용자에 걸쳐
+def save_rows():
+    return [
+        {
+            "user_id": user_id,
+            "activity_id": activity_id,
+            "description": f"memo {activity_id}" if activity_id % 3 == 0 else "",
+            "date": day,
+            "completed": activity_id % 2 == 0,
+        }
+        for user_id in (2, 3, 4)
+        for day in (date(2025, 1, 9), date(2025, 1, 10), date(2025, 6, 1))
+        for activity_id in range(1, 11)
+    ]
+
+
+# save_schedule_rows가 실행하는 문장과 첫 번째 파라미터 묶음 수집 (SAVEPOINT로 되돌림)
+def capture_save_statements(main, conn, rows):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.split(None, 1)[0].upper() in ("SAVEPOINT", "RELEASE", "ROLLBACK"):
+            return
+        if executemany:
+            parameters = parameters[0]
+        captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", before_cursor_execute)
+    savepoint = conn.begin_nested()
+    try:
+        main.save_schedule_rows(conn, rows)
+    finally:
+        event.remove(conn, "before_cursor_execute", before_cursor_execute)
+        savepoint.rollback()
+    return captured
+
+
+# 테스트용 데이터 생성 (사용자 20명 x 60일, 저장 방식에 맞게 save_schedule_rows로 저장)
+def seed(main, conn):
+    conn.execute(main.User.__table__.insert(), [
+        {"username": f"user{i}", "hashed_password": "x"} for i in range(1, 21)
+    ])
+    main.load_activity_catalog(conn)
+    rows = []
+    for user_id in range(1, 21):
+        for offset in range(60):
+            day = date.fromordinal(date(2025, 1, 1).toordinal() + offset)
+            for activity_id in range(1, 11):
+                rows.append({
+                    "user_id": user_id,
+                    "activity_id": activity_id,
+                    "description": "",
+                    "date": day,
+                    "completed": (user_id + offset + activity_id) % 3 == 0,
+                })
+    main.save_schedule_rows(conn, rows)
+    conn.exec_driver_sql("ANALYZE")
+
+
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    return explain_sql(conn, sql)
+
+
+def explain_sql(conn, sql, parameters=()):
+    return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, tuple(parameters))]
+
+
+# 전체를 읽어도 되는 작은 테이블 (활동 카탈로그는 compact 모드에서 행 펼치기용으로 교차 결합)
+SCAN_ALLOWED = {"activities"}
+
+
+# 실제 테이블을 처음부터 끝까지 읽는 경우만 실패로 봄 (서브쿼리 결과 스캔은 제외)
+def is_table_scan(detail, tables):
+    words = detail.split()
+    return len(words) > 1 and words[0] == "SCAN" and words[1] in tables and words[1] not in SCAN_ALLOWED
+
+
+# 한 저장 방식 점검 (환경 변수로 STORAGE_MODE와 DB를 정한 자식 프로세스에서 실행)
+def check():
+    import main as app_main
+
+    failed = False
+    with app_main.engine.begin() as conn:
+        app_main.init_db(conn)
+        seed(app_main, conn)
+        plans = [(name, explain(conn, stmt)) for name, stmt in build_queries(app_main)]
+        for index, (statement, parameters) in enumerate(capture_save_statements(app_main, conn, save_rows()), 1):
+            name = f"post_add_schedule #{index}: {' '.join(statement.split())[:60]}"
+            plans.append((name, explain_sql(conn, statement, parameters)))
+        for name, details in plans:
+            scans = [detail for detail in details if is_table_scan(detail, app_main.Base.metadata.tables)]
+            print(f"[{'FAIL' if scans else ' OK '}] {name}")
+            for detail in details:
+                print(f"       {detail}")
+            failed = failed or bool(scans)
+    app_main.engine.dispose()
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        sys.exit(0 if check() else 1)
+
+    failed = False
+    for mode in ("rows", "compact"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+            env["STORAGE_MODE"] = mode
+            print(f"== {mode} ==")
+            code = subprocess.call([sys.executable, __file__, "--child"], cwd=ROOT, env=env)
+        failed = failed or bool(code)
+
+    if failed:
+        print("테이블 전체 스캔이 발견되었습니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
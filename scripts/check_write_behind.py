@@ -0,0 +1,77 @@
+"""지연 쓰기(WRITE_BEHIND) 기록 실패 점검
+
+활동 1을 /schedules/batch로 저장한 뒤, DB 기록이 실패하는 도중에 같은 날짜의 활동 2만
+다시 저장하고, 다음 기록이 끝났을 때 두 활동이 모두 DB에 남아 있는지 확인한다.
+(실패한 기록을 되돌릴 때 새로 저장된 일부 활동이 앞선 활동을 덮어쓰지 않는지 확인하는 용도)
+하나라도 빠지면 종료 코드 1.
+
+사용법 (저장소 루트에서 실행):
+    python scripts/check_write_behind.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAY = date(2025, 1, 9)
+
+
+def batch(activity_id, description):
+    return {"days": [{
+        "date": DAY.isoformat(),
+        "activities": [{"activity_id": activity_id, "description": description, "completed": True}],
+    }]}
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'wb.db')}"
+        os.environ["WRITE_BEHIND"] = "1"
+        os.environ["WRITE_BEHIND_JOURNAL"] = os.path.join(tmp, "write_behind.journal")
+        os.environ["WRITE_BEHIND_FLUSH_MS"] = str(3600 * 1000)
+        os.environ["HASH_POOL_SIZE"] = "0"
+        from fastapi.testclient import TestClient
+        import main as app_main
+
+        with TestClient(app_main.app) as client:
+            client.post("/register", data={"username": "writer", "password": "pw"}, follow_redirects=False)
+            token = client.post("/token", data={"username": "writer", "password": "pw"}, follow_redirects=False)
+            client.cookies.set("access_token", token.cookies["access_token"])
+            assert client.post("/schedules/batch", json=batch(1, "first")).status_code == 200
+
+            # 기록 도중(쓰기 스레드 안에서) 같은 날짜의 활동 2만 저장한 뒤 실패시킴
+            save_schedule_rows = app_main.save_schedule_rows
+
+            def failing_save(conn, rows):
+                assert client.post("/schedules/batch", json=batch(2, "second")).status_code == 200
+                raise RuntimeError("flush failed on purpose")
+
+            app_main.save_schedule_rows = failing_save
+            try:
+                client.portal.call(app_main.write_behind.flush)
+                print("기록 실패가 일어나지 않았습니다.")
+                sys.exit(1)
+            except RuntimeError:
+                pass
+            finally:
+                app_main.save_schedule_rows = save_schedule_rows
+
+            client.portal.call(app_main.write_behind.flush)
+            with app_main.engine.connect() as conn:
+                user_id = conn.exec_driver_sql("SELECT id FROM users WHERE username = 'writer'").scalar()
+                saved = app_main.read_day_states(conn, [(user_id, DAY)])[(user_id, DAY)]
+            stats = app_main.write_behind.stats()
+        app_main.engine.dispose()
+
+    expected = {1: ("first", True), 2: ("second", True)}
+    ok = {activity_id: saved.get(activity_id) for activity_id in expected} == expected
+    print(f"[{' OK ' if ok else 'FAIL'}] 저장된 활동: {saved}, 실패한 기록 {stats['failed_flushes']}회")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""일별/월별 완료 집계 테이블 재생성
+
+기존 일정 데이터로 daily_rollups, monthly_rollups 테이블을 처음부터 다시 만든다.
+
+사용법 (저장소 루트에서 실행, DATABASE_URL 환경 변수로 대상 DB 지정 가능):
+    python scripts/rebuild_rollups.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import main as app_main
+
+    with app_main.engine.begin() as conn:
+        app_main.init_db(conn)
+        app_main.rebuild_rollups(conn)
+        daily = conn.execute(app_main.select(app_main.func.count()).select_from(app_main.DailyRollup)).scalar()
+        monthly = conn.execute(app_main.select(app_main.func.count()).select_from(app_main.MonthlyRollup)).scalar()
+    print(f"일별 집계 {daily}행, 월별 집계 {monthly}행을 다시 만들었습니다.")
+
+
+if __name__ == "__main__":
+    main()